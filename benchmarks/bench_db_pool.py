@@ -0,0 +1,62 @@
+"""Queries per second: a fresh connection per query vs. the shared pool.
+
+Needs the MySQL server from db/connection.py. Run from the repo root:
+
+    python -m benchmarks.bench_db_pool --seconds 10 --threads 4
+"""
+import argparse
+import threading
+import time
+
+import mysql.connector
+
+from db import connection
+
+QUERY = "SELECT timezone FROM user_settings WHERE user_id = %s"
+
+
+def per_call_query(user_id):
+    conn = mysql.connector.connect(**connection.db_config)
+    cur = conn.cursor()
+    cur.execute(QUERY, (user_id,))
+    cur.fetchall()
+    cur.close()
+    conn.close()
+
+
+def pooled_query(user_id):
+    with connection.cursor() as cur:
+        cur.execute(QUERY, (user_id,))
+        cur.fetchall()
+
+
+def run(query, seconds, threads):
+    counts = [0] * threads
+    deadline = time.monotonic() + seconds
+
+    def worker(i):
+        while time.monotonic() < deadline:
+            query(i)
+            counts[i] += 1
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return sum(counts) / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+
+    for name, query in (("per-call connect", per_call_query), ("pooled", pooled_query)):
+        qps = run(query, args.seconds, args.threads)
+        print(f"{name:>17}: {qps:10.1f} queries/s ({args.threads} threads)")
+
+
+if __name__ == "__main__":
+    main()
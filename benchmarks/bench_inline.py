@@ -0,0 +1,103 @@
+"""Inline query latency: building answers per keystroke, cold and cached.
+
+Replays the keystroke prefixes of realistic inline queries through
+handlers.inline.build_results with an empty and a warm answer cache, using
+~170 synthetic exchange rates. It then simulates typing at --typing-gap
+seconds per keystroke through the full handler with a stubbed answer() to
+count how many answers the debounce sends. Run from the repo root:
+
+    python -m benchmarks.bench_inline --rounds 200
+"""
+import argparse
+import asyncio
+import itertools
+import random
+import string
+import time
+from types import SimpleNamespace
+
+from rate_store import rate_store
+from handlers import inline
+
+QUERIES = [
+    "100 USD to IDR", "2500 jpy to eur", "100 usd to idr, eur, jpy", "50 eur to gbp",
+    "170 cm to ft", "25 c to f", "60 mph to km/h", "5 kilometers to miles", "12 fl oz to ml",
+]
+
+
+def load_rates():
+    rng = random.Random(1)
+    codes = {"USD", "EUR", "IDR", "JPY", "GBP"}
+    while len(codes) < 170:
+        codes.add("".join(rng.choice(string.ascii_uppercase) for _ in range(3)))
+    rates = {code: rng.uniform(0.1, 20000) for code in codes}
+    rates["USD"] = 1.0
+    rate_store.update("2026-01-01T00:00:00", rates)
+
+
+def keystrokes():
+    return [query[:i] for query in QUERIES for i in range(1, len(query) + 1)]
+
+
+async def measure(prefixes, rounds, clear):
+    timings = []
+    for _ in range(rounds):
+        if clear:
+            inline.inline_cache.clear()
+        for prefix in prefixes:
+            start = time.perf_counter()
+            await inline.build_results(prefix)
+            timings.append(time.perf_counter() - start)
+    timings.sort()
+    return timings
+
+
+class FakeInlineQuery:
+    ids = itertools.count()
+
+    def __init__(self, text, answers):
+        self.query = text
+        self.id = str(next(self.ids))
+        self.from_user = SimpleNamespace(id=42)
+        self._answers = answers
+
+    async def answer(self, results, **kwargs):
+        self._answers.append((self.query, len(results)))
+
+
+async def simulate_typing(gap):
+    answers = []
+    tasks = []
+    for query in QUERIES:
+        for i in range(1, len(query) + 1):
+            update = SimpleNamespace(inline_query=FakeInlineQuery(query[:i], answers))
+            tasks.append(asyncio.create_task(inline.inline_query(update, None)))
+            await asyncio.sleep(gap)
+        await asyncio.sleep(inline.INLINE_DEBOUNCE * 2)  # pause before the next query
+    await asyncio.gather(*tasks)
+    return answers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--typing-gap", type=float, default=0.12, help="seconds between keystrokes")
+    args = parser.parse_args()
+
+    load_rates()
+    prefixes = keystrokes()
+    for label, clear in (("cold", True), ("cached", False)):
+        timings = asyncio.run(measure(prefixes, args.rounds, clear))
+        p50 = timings[len(timings) // 2] * 1e6
+        p99 = timings[int(len(timings) * 0.99)] * 1e6
+        print(f"build_results {label:>6}: p50 {p50:8.1f} us  p99 {p99:8.1f} us  ({len(timings)} keystrokes)")
+
+    answers = asyncio.run(simulate_typing(args.typing_gap))
+    print(f"typing at {args.typing_gap * 1000:.0f} ms/keystroke: {len(prefixes)} inline queries, "
+          f"{len(answers)} answered (debounce {inline.INLINE_DEBOUNCE}s)")
+    for query, count in answers:
+        print(f"  {query!r}: {count} result(s)")
+
+
+if __name__ == "__main__":
+    main()
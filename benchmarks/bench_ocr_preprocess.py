@@ -0,0 +1,86 @@
+"""Latency and OCR accuracy of /tlpic preprocessing, old pipeline vs. current.
+
+A corpus is a directory of images, each with a sidecar <name>.txt holding the
+expected text. Without --corpus a synthetic corpus is rendered (light, dark,
+low-contrast, small and large photos). Accuracy needs the tesseract binary.
+
+    python -m benchmarks.bench_ocr_preprocess [--corpus DIR] [--repeat 5]
+"""
+import argparse
+import difflib
+import io
+import shutil
+import time
+from pathlib import Path
+
+from PIL import Image, ImageDraw, ImageEnhance
+
+from handlers.ocr import detect_rotation, preprocess_image, run_tesseract
+
+SAMPLE_TEXT = "The quick brown fox jumps over the lazy dog 1234567890"
+
+# (name, canvas size, background, text colour, font size)
+SYNTHETIC = [
+    ("light", (1000, 400), (245, 245, 240), (20, 20, 20), 36),
+    ("dark", (1000, 400), (25, 25, 30), (230, 230, 230), 36),
+    ("low_contrast", (1000, 400), (120, 120, 120), (60, 60, 60), 36),
+    ("small", (420, 160), (255, 255, 255), (0, 0, 0), 14),
+    ("large_photo", (4000, 3000), (200, 190, 180), (10, 10, 10), 120),
+]
+
+
+def legacy_preprocess(image_bytes):
+    img = Image.open(io.BytesIO(image_bytes)).convert("L")
+    if img.width >= 150 and img.height >= 150:
+        img = detect_rotation(img)
+    img = img.resize((1200, int(img.height * (1200 / img.width))))
+    img = ImageEnhance.Sharpness(img).enhance(2.5)
+    return img.point(lambda p: 255 if p > 150 else 0)
+
+
+def synthetic_corpus():
+    for name, size, background, colour, font_size in SYNTHETIC:
+        img = Image.new("RGB", size, background)
+        draw = ImageDraw.Draw(img)
+        draw.text((size[0] // 20, size[1] // 3), SAMPLE_TEXT, fill=colour, font_size=font_size)
+        buf = io.BytesIO()
+        img.save(buf, format="JPEG", quality=90)
+        yield name, buf.getvalue(), SAMPLE_TEXT
+
+
+def load_corpus(directory):
+    for path in sorted(Path(directory).iterdir()):
+        truth = path.with_suffix(".txt")
+        if path.suffix.lower() in (".jpg", ".jpeg", ".png", ".webp") and truth.exists():
+            yield path.name, path.read_bytes(), truth.read_text().strip()
+
+
+def accuracy(img, expected):
+    text = " ".join(run_tesseract(img, ["-l", "eng", "--psm", "6"], 60).split())
+    return difflib.SequenceMatcher(None, text, " ".join(expected.split())).ratio()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", help="directory of images with .txt ground truth")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    corpus = list(load_corpus(args.corpus) if args.corpus else synthetic_corpus())
+    has_tesseract = shutil.which("tesseract") is not None
+    if not has_tesseract:
+        print("tesseract not found; reporting latency only")
+
+    print(f"{'image':<16}{'pipeline':<10}{'ms':>9}{'accuracy':>10}")
+    for name, data, expected in corpus:
+        for label, pipeline in (("legacy", legacy_preprocess), ("current", preprocess_image)):
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                img = pipeline(data)
+            ms = (time.perf_counter() - start) / args.repeat * 1000
+            score = f"{accuracy(img, expected):.1%}" if has_tesseract else "-"
+            print(f"{name:<16}{label:<10}{ms:>9.1f}{score:>10}")
+
+
+if __name__ == "__main__":
+    main()
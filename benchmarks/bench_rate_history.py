@@ -0,0 +1,88 @@
+"""Rate history ingest and query speed over years of hourly snapshots.
+
+Appends --years of hourly snapshots of ~170 synthetic currencies (random
+walks) to a fresh RateHistory in a temp directory, one append per snapshot
+as the hourly job does, then times "on <date>" lookups at random days and
+min/max/trend queries over 30, 90 and 365 day windows. Run from the repo root:
+
+    python -m benchmarks.bench_rate_history --years 5
+"""
+import argparse
+import os
+import random
+import string
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from rate_history import RateHistory
+
+
+def make_codes(rng, count):
+    codes = {"USD", "EUR", "IDR", "JPY", "GBP"}
+    while len(codes) < count:
+        codes.add("".join(rng.choice(string.ascii_uppercase) for _ in range(3)))
+    return sorted(codes)
+
+
+def timed(fn, calls):
+    timings = []
+    for args in calls:
+        start = time.perf_counter()
+        fn(*args)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return timings[len(timings) // 2] * 1e6, timings[int(len(timings) * 0.99)] * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--years", type=float, default=5)
+    parser.add_argument("--currencies", type=int, default=170)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    codes = make_codes(rng, args.currencies)
+    hours = int(args.years * 365 * 24)
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc) - timedelta(hours=hours)
+    walk = np.random.default_rng(1)
+    base = np.array([rng.uniform(0.1, 20000) for _ in codes])
+    steps = np.exp(np.cumsum(walk.normal(0, 0.001, size=(hours, len(codes))), axis=0)) * base
+    steps[:, codes.index("USD")] = 1.0
+    snapshots = [((start + timedelta(hours=h)).isoformat(), dict(zip(codes, steps[h].tolist())))
+                 for h in range(hours)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        history = RateHistory(directory)
+        began = time.perf_counter()
+        for timestamp, rates in snapshots:
+            history.append(timestamp, rates)
+        elapsed = time.perf_counter() - began
+        size = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+        print(f"ingest: {hours:,} hourly snapshots x {len(codes)} currencies in {elapsed:.2f}s "
+              f"({hours / elapsed:,.0f} appends/s), {size / 2**20:.1f} MiB on disk")
+
+        # A fresh instance, as after a restart: everything is read through the memory map.
+        history = RateHistory(directory)
+        end = start + timedelta(hours=hours)
+        days = (end - start).days
+        pairs = [(rng.choice(codes), rng.choice(codes)) for _ in range(args.queries)]
+        lookups = [(a, b, (start + timedelta(days=rng.randrange(days))).date()) for a, b in pairs]
+        p50, p99 = timed(history.rate_on, lookups)
+        print(f"rate_on        : p50 {p50:8.1f} us  p99 {p99:8.1f} us")
+        for window in (30, 90, 365):
+            if window >= days:
+                continue
+            calls = []
+            for a, b in pairs:
+                first = start + timedelta(days=rng.randrange(days - window))
+                calls.append((a, b, first, first + timedelta(days=window)))
+            p50, p99 = timed(history.stats, calls)
+            print(f"stats {window:>3} days : p50 {p50:8.1f} us  p99 {p99:8.1f} us  ({window * 24} samples)")
+
+
+if __name__ == "__main__":
+    main()
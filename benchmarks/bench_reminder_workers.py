@@ -0,0 +1,135 @@
+"""Reminder delivery across several worker processes sharing one database.
+
+Fills a fresh SQLite database with reminders that are due in a few seconds,
+then starts N processes, each running its own ReminderEngine against a fake
+bot. It reports throughput, duplicate sends and missed reminders. With
+--crash, worker 0 dies part-way through its batch. Its claimed but unsent
+reminders must then be picked up by the others once their lease expires.
+The few it sent but had not acknowledged yet are sent again; that window
+between send and ack is the only source of duplicates. With --groups, the
+reminders go to that many group chats sending at --group-rate, so a claimed
+batch takes longer than the lease and must be kept by renewing it.
+Run from the repo root:
+
+    python -m benchmarks.bench_reminder_workers --workers 4 --reminders 2000 --crash
+    python -m benchmarks.bench_reminder_workers --reminders 400 --groups 2 --group-rate 10 --lease 2
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+import pytz
+
+START_DELAY = 3  # seconds until the reminders fall due, so every worker has loaded them
+
+
+class FakeBot:
+    def __init__(self, results, worker, crash_after):
+        self.results = results
+        self.worker = worker
+        self.crash_after = crash_after
+        self.sent = 0
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self.results.put((self.worker, int(text.rsplit(" ", 1)[1]), time.time()))
+        self.sent += 1
+        if self.sent == self.crash_after:
+            self.results.close()
+            self.results.join_thread()  # flush what was "sent" before dying
+            os._exit(1)  # die holding leases on the rest of the batch
+
+
+def worker(index, results, lease, crash_after, run_for, group_rate):
+    os.environ["REMINDER_LEASE"] = str(lease)
+    os.environ["WORKER_ID"] = f"bench-{index}"
+    import sender
+    import reminder_engine
+
+    # Measure the storage and claim path, not Telegram's rate limits.
+    sender.GLOBAL_RATE = sender.PRIVATE_RATE = 1e6
+    sender.GROUP_RATE = group_rate or 1e6
+    sender.sender = sender.OutboundSender()
+    reminder_engine.sender = sender.sender
+
+    async def main():
+        engine = reminder_engine.ReminderEngine()
+        engine.bot = FakeBot(results, index, crash_after)
+        task = asyncio.create_task(engine.run())
+        await asyncio.sleep(run_for)
+        task.cancel()
+        await engine.stop()
+        await sender.sender.stop()
+
+    asyncio.run(main())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--reminders", type=int, default=2000)
+    parser.add_argument("--lease", type=float, default=3.0, help="REMINDER_LEASE for the workers, seconds")
+    parser.add_argument("--crash", action="store_true", help="kill worker 0 after its first few sends")
+    parser.add_argument("--groups", type=int, default=0, help="send to this many group chats instead of private ones")
+    parser.add_argument("--group-rate", type=float, default=10.0, help="messages per second per group, per worker")
+    args = parser.parse_args()
+
+    tmpdir = tempfile.TemporaryDirectory()
+    os.environ["DB_BACKEND"] = "sqlite"
+    os.environ["SQLITE_PATH"] = os.path.join(tmpdir.name, "workers.sqlite3")
+
+    from db import connection, reminder_db
+    from db.migrations import ensure_schema
+    ensure_schema()
+    due = datetime.now(pytz.UTC) + timedelta(seconds=START_DELAY)
+    reminder_db.add_reminders([
+        (-(1000 + i % args.groups) if args.groups else 10_000 + i, 1, f"reminder {i}", due, "once", due)
+        for i in range(args.reminders)
+    ])
+
+    # Long enough for a crashed worker's leases to expire and be retried.
+    run_for = START_DELAY + args.lease * 2 + 5
+    group_rate = 0
+    if args.groups:
+        group_rate = args.group_rate
+        run_for += args.reminders / (args.groups * group_rate)
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    procs = [
+        ctx.Process(target=worker, args=(i, results, args.lease, 10 if args.crash and i == 0 else 0, run_for, group_rate))
+        for i in range(args.workers)
+    ]
+    for p in procs:
+        p.start()
+
+    sends = []
+    deadline = time.time() + run_for + 10
+    while time.time() < deadline and (any(p.is_alive() for p in procs) or not results.empty()):
+        try:
+            sends.append(results.get(timeout=0.2))
+        except Exception:
+            pass
+    for p in procs:
+        p.join()
+
+    counts = Counter(reminder for _, reminder, _ in sends)
+    duplicates = sum(n - 1 for n in counts.values() if n > 1)
+    missing = args.reminders - len(counts)
+    per_worker = Counter(w for w, _, _ in sends)
+    if sends:
+        span = max(t for _, _, t in sends) - min(t for _, _, t in sends)
+        print(f"sent {len(sends)} in {span:.2f}s ({len(sends) / max(span, 1e-6):.0f}/s)")
+    print("per worker:", dict(sorted(per_worker.items())))
+    with connection.cursor() as cur:
+        cur.execute("SELECT COUNT(*) FROM reminders")
+        left = cur.fetchone()[0]
+    print(f"duplicates: {duplicates}  missing: {missing}  left in db: {left}")
+    tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
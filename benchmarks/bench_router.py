@@ -0,0 +1,132 @@
+"""Message routing cost: the old smart_dispatcher parse chain vs. router.route_all.
+
+Runs both over a synthetic group-chat corpus, where most messages are plain
+chat and a few percent are conversions, and lists where they disagree.
+route_all is what smart_dispatcher calls; the single-conversion route() is
+timed too for reference. Run from the repo root:
+
+    python -m benchmarks.bench_router --messages 200000
+"""
+import argparse
+import random
+import re
+import time
+from collections import Counter
+
+from router import route, route_all
+
+CHAT = [
+    "lol", "ok", "good morning everyone", "anyone up for lunch?", "see you at 7",
+    "haha that's wild 😂", "https://example.com/some/article?id=42", "brb",
+    "I'll be there in 10 minutes", "2 more days to go!", "who's going to the meetup tomorrow",
+    "thanks!", "can someone send the link to the doc", "👍", "no idea tbh",
+    "3 people are coming to dinner", "@alice did you see this", "ship it", "the meeting moved to 4pm",
+    "100% agree", "let's talk to him later", "it's 30 degrees today", "price went up to 5k",
+]
+CONVERSIONS = [
+    "100 usd to idr", "2500 JPY to EUR", "50 eur to usd please", "1.5 btc to usd", "10usd to sgd",
+    "170 cm to ft", "25 c to f", "5 miles to km", "2 kilograms to pounds", "12 fl oz to ml",
+    "60 mph to km/h", "3 liters to gallons", "98.6 fahrenheit to celsius", "10 m/s to ft/s",
+    "7 stone to kg", "100 apples to oranges",
+]
+
+
+def legacy_parse_message(text):
+    match = re.match(r"(\d+(?:\.\d+)?)\s*([a-zA-Z]{3})\s+to\s+([a-zA-Z]{3})", text.strip(), re.IGNORECASE)
+    if match:
+        return float(match.group(1)), match.group(2).upper(), match.group(3).upper()
+    return None
+
+
+def legacy_parse_unit_message(text):
+    unit_keywords = {
+        "kg": ["kg", "kilogram", "kilograms"],
+        "lbs": ["lbs", "lb", "pound", "pounds"],
+        "g": ["g", "gram", "grams"],
+        "oz": ["oz", "ounce", "ounces"],
+        "m": ["m", "meter", "meters"],
+        "ft": ["ft", "foot", "feet"],
+        "cm": ["cm", "centimeter", "centimeters"],
+        "in": ["in", "inch", "inches"],
+        "km": ["km", "kilometer", "kilometers"],
+        "mi": ["mi", "mile", "miles"],
+        "l": ["l", "liter", "liters"],
+        "gal": ["gal", "gallon", "gallons"],
+        "ml": ["ml", "milliliter", "milliliters"],
+        "fl oz": ["fl oz", "fluid ounce", "fluid ounces"],
+        "km/h": ["km/h", "kilometers per hour"],
+        "mph": ["mph", "miles per hour"],
+        "m/s": ["m/s", "meters per second"],
+        "ft/s": ["ft/s", "feet per second"],
+        "c": ["c", "celsius", "degree celsius"],
+        "f": ["f", "fahrenheit", "degree fahrenheit"],
+        "k": ["k", "kelvin"]
+    }
+    match = re.match(r"(\d+(?:\.\d+)?)\s*([a-zA-Z ]+)\s+to\s+([a-zA-Z ]+)", text.strip(), re.IGNORECASE)
+    if match:
+        amount = float(match.group(1))
+        from_unit = match.group(2).strip().lower()
+        to_unit = match.group(3).strip().lower()
+        from_unit_key = next((key for key, aliases in unit_keywords.items() if from_unit in aliases), None)
+        to_unit_key = next((key for key, aliases in unit_keywords.items() if to_unit in aliases), None)
+        if from_unit_key and to_unit_key:
+            return amount, from_unit_key, to_unit_key
+    return None
+
+
+def legacy_route(text):
+    # smart_dispatcher, plus the second parse inside the handler it calls
+    if legacy_parse_message(text):
+        return "currency", legacy_parse_message(text)
+    if legacy_parse_unit_message(text):
+        return "unit", legacy_parse_unit_message(text)
+    return None
+
+
+def make_corpus(count, conversion_share):
+    rng = random.Random(42)
+    return [rng.choice(CONVERSIONS) if rng.random() < conversion_share else rng.choice(CHAT) for _ in range(count)]
+
+
+def dispatched(text):
+    # What smart_dispatcher does: every conversion in the message, via route_all.
+    conversions = route_all(text)
+    if len(conversions) == 1:
+        return conversions[0]
+    return conversions or None
+
+
+def timed(func, corpus):
+    start = time.perf_counter()
+    results = [func(text) for text in corpus]
+    return time.perf_counter() - start, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=200_000)
+    parser.add_argument("--conversion-share", type=float, default=0.03)
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.messages, args.conversion_share)
+    legacy_time, legacy_results = timed(legacy_route, corpus)
+    current_time, current_results = timed(dispatched, corpus)
+    single_time, _ = timed(route, corpus)
+
+    # The unit registry understands more than the old alias lists did
+    # ("7 stone to kg", "60 mph to km/h"), so show what changed rather than
+    # expecting identical output.
+    changed = Counter(
+        (text, legacy, current)
+        for text, legacy, current in zip(corpus, legacy_results, current_results) if legacy != current
+    )
+    routed = sum(r is not None for r in current_results)
+    for label, elapsed in (("legacy", legacy_time), ("route_all", current_time), ("route", single_time)):
+        print(f"{label:>9}: {elapsed / args.messages * 1e6:7.2f} us/message  ({args.messages / elapsed:,.0f} messages/s)")
+    print(f"speedup (route_all, as dispatched) {legacy_time / current_time:.1f}x, {routed} routed, {sum(changed.values())} routed differently:")
+    for (text, legacy, current), count in changed.most_common():
+        print(f"  {count:6}x {text!r}: {legacy} -> {current}")
+
+
+if __name__ == "__main__":
+    main()
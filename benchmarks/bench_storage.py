@@ -0,0 +1,107 @@
+"""Reminder storage throughput: bulk insert, due-scan and bulk delete per backend.
+
+SQLite runs against a throwaway file. MySQL uses the DB_* settings from
+db/connection.py and adds/removes its own rows in `reminders`, so point
+DB_NAME at a scratch database. Run from the repo root:
+
+    python -m benchmarks.bench_storage --rows 1000000
+    python -m benchmarks.bench_storage --backend mysql --rows 1000000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import pytz
+
+from db import connection, reminder_db
+from db.migrations import ensure_schema
+
+BENCH_CHAT_IDS = range(-1_000_999, -1_000_000)  # negative ids keep bench rows apart
+SPREAD_DAYS = 30  # reminders are spread over this many days from now
+SCAN_WINDOW = timedelta(hours=1)  # the engine's refill horizon
+
+
+def make_rows(count, now):
+    rows = []
+    for _ in range(count):
+        run_at = now + timedelta(seconds=random.randrange(SPREAD_DAYS * 86400))
+        recurrence = "once" if random.random() < 0.9 else random.choice(("daily", "weekly", "monthly"))
+        rows.append((random.choice(BENCH_CHAT_IDS), random.randrange(1, 100_000), "bench reminder",
+                     run_at, recurrence, run_at))
+    return rows
+
+
+def bench_insert(rows, chunk):
+    start = time.perf_counter()
+    for i in range(0, len(rows), chunk):
+        reminder_db.add_reminders(rows[i:i + chunk])
+    return time.perf_counter() - start
+
+
+def bench_scan(now, scans):
+    """Due-scans for random one-hour windows, like the engine's refill."""
+    found = 0
+    start = time.perf_counter()
+    for _ in range(scans):
+        until = now + timedelta(seconds=random.randrange(SPREAD_DAYS * 86400))
+        with connection.cursor(dictionary=True) as cur:
+            cur.execute(
+                "SELECT id, chat_id, user_id, remind_text, run_at, recurrence, next_run_at FROM reminders "
+                "WHERE next_run_at > %s AND next_run_at <= %s ORDER BY next_run_at",
+                (until - SCAN_WINDOW, until)
+            )
+            found += len(cur.fetchall())
+    return time.perf_counter() - start, found
+
+
+def bench_delete(chunk):
+    placeholders = ", ".join(["%s"] * len(BENCH_CHAT_IDS))
+    with connection.cursor() as cur:
+        cur.execute(f"SELECT id FROM reminders WHERE chat_id IN ({placeholders})", list(BENCH_CHAT_IDS))
+        ids = [row[0] for row in cur.fetchall()]
+    random.shuffle(ids)  # acks arrive in fire order, not insert order
+    start = time.perf_counter()
+    for i in range(0, len(ids), chunk):
+        reminder_db.delete_reminders(ids[i:i + chunk])
+    return time.perf_counter() - start, len(ids)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", choices=("sqlite", "mysql"), default="sqlite")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--chunk", type=int, default=reminder_db.BATCH_SIZE, help="rows per insert/delete call")
+    parser.add_argument("--scans", type=int, default=200)
+    args = parser.parse_args()
+
+    tmpdir = None
+    if args.backend == "sqlite":
+        tmpdir = tempfile.TemporaryDirectory()
+        connection.set_backend(connection.SQLiteBackend(os.path.join(tmpdir.name, "bench.sqlite3")))
+    else:
+        connection.set_backend(connection.MySQLBackend())
+    ensure_schema()
+
+    random.seed(42)
+    now = datetime.utcnow().replace(tzinfo=pytz.UTC, microsecond=0)
+    rows = make_rows(args.rows, now)
+
+    elapsed = bench_insert(rows, args.chunk)
+    print(f"{args.backend}: insert   {args.rows / elapsed:12.0f} rows/s  ({elapsed:.2f}s for {args.rows})")
+
+    elapsed, found = bench_scan(now, args.scans)
+    print(f"{args.backend}: due-scan {elapsed / args.scans * 1000:12.2f} ms/scan "
+          f"(avg {found / args.scans:.0f} rows per {SCAN_WINDOW} window)")
+
+    elapsed, deleted = bench_delete(args.chunk)
+    print(f"{args.backend}: delete   {deleted / elapsed:12.0f} rows/s  ({elapsed:.2f}s for {deleted})")
+
+    if tmpdir is not None:
+        tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
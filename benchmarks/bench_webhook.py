@@ -0,0 +1,150 @@
+"""Load test for webhook mode with a fake Telegram on both sides.
+
+Serves a fake Bot API that answers getMe/sendMessage/etc. and POSTs
+synthetic message updates to the bot's webhook. It reports webhook
+status codes and POST latency, plus update-to-reply latency for the replies
+that arrive. Start this first; it waits for the bot's /health, then the
+bot can be started against the fake API from another shell:
+
+    python -m benchmarks.bench_webhook --updates 5000 --concurrency 100
+    DB_BACKEND=sqlite BOT_MODE=webhook WEBHOOK_SECRET=load-test \\
+        TELEGRAM_API_URL=http://127.0.0.1:8081/bot python main.py
+
+/start replies directly. Replies from handlers that go through the
+outbound sender (e.g. --text "100 usd to eur") are capped by its
+30 messages/s global limit by design. Webhook ingest is not capped.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from collections import Counter
+
+from aiohttp import ClientSession, TCPConnector, web
+
+FAKE_BOT = {"id": 1, "is_bot": True, "first_name": "Fake", "username": "fake_bot"}
+FIRST_CHAT_ID = 100_000  # one private chat per update, so per-chat limits don't apply
+
+
+class FakeTelegram:
+    def __init__(self):
+        self.posted_at = {}  # chat_id -> time the update was POSTed
+        self.reply_latency = []
+        self.calls = Counter()
+        self.message_id = 0
+
+    async def bot_api(self, request):
+        method = request.match_info["method"]
+        self.calls[method] += 1
+        data = await request.post()
+        if method == "getMe":
+            result = FAKE_BOT
+        elif method == "sendMessage":
+            chat_id = int(data["chat_id"])
+            if chat_id in self.posted_at:
+                self.reply_latency.append(time.perf_counter() - self.posted_at[chat_id])
+            self.message_id += 1
+            result = {
+                "message_id": self.message_id,
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"},
+                "text": data.get("text", ""),
+            }
+        else:
+            result = True
+        return web.json_response({"ok": True, "result": result})
+
+
+def make_update(i, text):
+    chat_id = FIRST_CHAT_ID + i
+    message = {
+        "message_id": i + 1,
+        "date": int(time.time()),
+        "chat": {"id": chat_id, "type": "private"},
+        "from": {"id": chat_id, "is_bot": False, "first_name": "Load"},
+        "text": text,
+    }
+    if text.startswith("/"):
+        message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+    return {"update_id": i + 1, "message": message}
+
+
+def percentile(values, pct):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+async def drive(fake, args):
+    statuses = Counter()
+    post_latency = []
+    queue = asyncio.Queue()
+    for i in range(args.updates):
+        queue.put_nowait(i)
+
+    async with ClientSession(connector=TCPConnector(limit=args.concurrency)) as session:
+        health_url = args.url.rsplit("/", 1)[0] + "/health"
+        print(f"waiting for {health_url} ...")
+        while True:
+            try:
+                async with session.get(health_url) as response:
+                    if response.status == 200 and (await response.json())["status"] == "ok":
+                        break
+            except OSError:
+                pass
+            await asyncio.sleep(0.5)
+
+        async def poster():
+            while not queue.empty():
+                i = queue.get_nowait()
+                fake.posted_at[FIRST_CHAT_ID + i] = start = time.perf_counter()
+                async with session.post(
+                    args.url, json=make_update(i, args.text),
+                    headers={"X-Telegram-Bot-Api-Secret-Token": args.secret},
+                ) as response:
+                    statuses[response.status] += 1
+                post_latency.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(poster() for _ in range(args.concurrency)))
+        ingest = time.perf_counter() - start
+
+        # Let queued replies drain through the sender.
+        deadline = time.monotonic() + args.drain
+        while len(fake.reply_latency) < statuses[200] and time.monotonic() < deadline:
+            await asyncio.sleep(0.2)
+
+    print(f"webhook: {args.updates} updates in {ingest:.2f}s ({args.updates / ingest:.0f}/s), statuses {dict(statuses)}")
+    print(f"  POST latency  p50 {percentile(post_latency, 50) * 1000:.1f} ms  "
+          f"p99 {percentile(post_latency, 99) * 1000:.1f} ms")
+    replies = fake.reply_latency
+    print(f"replies: {len(replies)}/{statuses[200]}"
+          + (f"  p50 {statistics.median(replies):.2f}s  p99 {percentile(replies, 99):.2f}s" if replies else ""))
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8080/telegram", help="the bot's webhook URL")
+    parser.add_argument("--secret", default="load-test", help="must match the bot's WEBHOOK_SECRET")
+    parser.add_argument("--api-port", type=int, default=8081, help="port for the fake Bot API")
+    parser.add_argument("--updates", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--text", default="/start")
+    parser.add_argument("--drain", type=float, default=30, help="seconds to wait for replies")
+    args = parser.parse_args()
+
+    fake = FakeTelegram()
+    api = web.Application()
+    api.router.add_post("/bot{token}/{method}", fake.bot_api)
+    runner = web.AppRunner(api, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", args.api_port).start()
+    try:
+        await drive(fake, args)
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,110 @@
+import os
+import json
+import asyncio
+from dotenv import load_dotenv
+from pathlib import Path
+# Load environment variables from .env
+load_dotenv(dotenv_path=Path(__file__).parent / ".env")
+import logging
+from telegram import Update
+from telegram.ext import Application, CommandHandler, MessageHandler, ContextTypes, filters
+
+from handlers.currency import handle_currency
+from handlers.unit import handle_unit
+from handlers.batch import handle_batch
+from handlers.start import start
+from handlers.translate import get_handler as get_tl_handler
+from handlers.translate_image import get_handler as get_tlpic_handler
+from handlers.translate_audio import get_handler as get_tlvoice_handler
+from handlers.remind import get_handlers as get_remind_handlers
+from handlers.timezone import get_handler as get_timezone_handler
+from handlers.inline import get_handler as get_inline_handler
+from handlers.history import get_handler as get_trend_handler
+from handlers.ocr import ocr_pool
+
+from scheduler import start_scheduler, update_rates
+from utils import close_http_client
+from router import route_all
+from rate_store import rate_store
+import translator
+from reminder_engine import engine as reminder_engine
+from sender import sender
+from db import async_db
+from db.migrations import ensure_schema
+import webhook
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    logger = logging.getLogger(__name__)
+
+    os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = str(Path(__file__).parent / "google_api.json")
+
+    TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
+    if not TOKEN:
+        logger.error("TELEGRAM_BOT_TOKEN missing in environment.")
+        exit(1)
+
+    ensure_schema()
+
+    # Warm start from the persisted snapshot; the refresh runs in the background.
+    rate_store.reload()
+
+    async def on_startup(app):
+        # Rates are fetched and recorded by the process that receives updates;
+        # delivery-only workers would just repeat the API call.
+        if webhook.BOT_MODE != "worker":
+            start_scheduler()
+            app.create_task(update_rates())
+        sender.start()
+        reminder_engine.start(app)
+
+    async def on_shutdown(app):
+        await reminder_engine.stop()
+        logger.info("Outbound sender: %s", sender.stats())
+        await sender.stop()
+        await close_http_client()
+        async_db.shutdown()
+        ocr_pool.shutdown()
+        await translator.close()
+
+    builder = Application.builder().token(TOKEN).post_init(on_startup).post_shutdown(on_shutdown)
+    if os.getenv("TELEGRAM_API_URL"):
+        builder = builder.base_url(os.getenv("TELEGRAM_API_URL"))  # e.g. a local Bot API server or fake
+    if webhook.BOT_MODE == "webhook":
+        builder = webhook.configure(builder)
+    elif webhook.BOT_MODE == "worker":
+        builder = builder.updater(None)
+    app = builder.build()
+
+    async def smart_dispatcher(update: Update, context: ContextTypes.DEFAULT_TYPE):
+        conversions = route_all(update.message.text)
+        if not conversions:
+            return
+        if len(conversions) > 1 or conversions[0][0] == "history":
+            await handle_batch(update, context, conversions)
+            return
+        kind, parsed = conversions[0]
+        if kind == "currency":
+            await handle_currency(update, context, parsed)
+        else:
+            await handle_unit(update, context, parsed)
+
+    # Register handlers
+    app.add_handler(CommandHandler("start", start))
+    app.add_handler(CommandHandler("help", start))
+    app.add_handler(get_tl_handler())
+    app.add_handler(get_tlpic_handler())
+    # app.add_handler(get_tlvoice_handler())
+    for handler in get_remind_handlers():
+        app.add_handler(handler)
+    app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, smart_dispatcher))
+    app.add_handler(get_timezone_handler())
+    app.add_handler(get_inline_handler())
+    app.add_handler(get_trend_handler())
+
+    if webhook.BOT_MODE == "webhook":
+        asyncio.run(webhook.run_webhook(app))
+    elif webhook.BOT_MODE == "worker":
+        asyncio.run(webhook.run_worker(app))
+    else:
+        app.run_polling()
@@ -0,0 +1,56 @@
+"""Awaitable versions of the db functions for use inside handlers.
+
+Every query runs on a dedicated thread pool sized to the connection pool,
+so at most DB_POOL_SIZE queries are in flight and a slow one only ties up
+its own worker, never the event loop.
+"""
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from . import reminder_db, user_settings_db
+from .connection import POOL_SIZE
+
+_executor = ThreadPoolExecutor(max_workers=POOL_SIZE, thread_name_prefix="db")
+
+
+async def run(func, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(func, *args, **kwargs))
+
+
+def _async(func):
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await run(func, *args, **kwargs)
+    return wrapper
+
+
+add_reminder = _async(reminder_db.add_reminder)
+delete_reminder_by_id = _async(reminder_db.delete_reminder_by_id)
+get_upcoming_reminders = _async(reminder_db.get_upcoming_reminders)
+set_next_run_at = _async(reminder_db.set_next_run_at)
+get_recurring_reminders_by_user = _async(reminder_db.get_recurring_reminders_by_user)
+add_reminders = _async(reminder_db.add_reminders)
+delete_reminders = _async(reminder_db.delete_reminders)
+set_next_run_at_many = _async(reminder_db.set_next_run_at_many)
+claim_reminders = _async(reminder_db.claim_reminders)
+renew_leases = _async(reminder_db.renew_leases)
+count_reminders_by_chat = _async(reminder_db.count_reminders_by_chat)
+get_reminders_page = _async(reminder_db.get_reminders_page)
+
+set_user_timezone = _async(user_settings_db.set_user_timezone)
+load_user_timezones = _async(user_settings_db.load_user_timezones)
+
+
+async def get_user_tz(user_id):
+    # Cache hits are answered on the loop without a hop to the db pool.
+    return user_settings_db.cached_timezone(user_id) or await run(user_settings_db.get_user_tz, user_id)
+
+
+async def get_user_timezone(user_id):
+    return (await get_user_tz(user_id)).zone
+
+
+def shutdown():
+    _executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,181 @@
+import os
+import time
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+import mysql.connector
+from mysql.connector import pooling
+import pytz
+
+DB_BACKEND = os.getenv("DB_BACKEND", "mysql")  # "mysql" or "sqlite"
+SQLITE_PATH = os.getenv("SQLITE_PATH", "takonaut.sqlite3")
+
+db_config = {
+    "host": os.getenv("DB_HOST", "localhost"),
+    "user": os.getenv("DB_USER", "root"),
+    "password": os.getenv("DB_PASSWORD", ""),
+    "database": os.getenv("DB_NAME", "takonaut"),
+}
+
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "5"))  # seconds to wait for a free connection
+
+
+class MySQLBackend:
+    dialect = "mysql"
+
+    def __init__(self, config=None, pool_size=POOL_SIZE):
+        self.config = config or db_config
+        self.pool_size = pool_size
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    def get_pool(self):
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = pooling.MySQLConnectionPool(
+                        pool_name="takonaut",
+                        pool_size=self.pool_size,
+                        pool_reset_session=True,
+                        **self.config,
+                    )
+        return self._pool
+
+    def get_connection(self):
+        """Borrow a live connection from the pool; release() hands it back."""
+        deadline = time.monotonic() + POOL_TIMEOUT
+        while True:
+            try:
+                conn = self.get_pool().get_connection()
+                break
+            except pooling.PoolError:
+                if time.monotonic() >= deadline:
+                    raise
+                time.sleep(0.01)
+        try:
+            # Health check: reconnect connections the server dropped while idle.
+            conn.ping(reconnect=True, attempts=2, delay=0)
+        except mysql.connector.Error:
+            conn.close()
+            raise
+        return conn
+
+    def release(self, conn):
+        conn.close()
+
+    def cursor(self, conn, dictionary=False):
+        return conn.cursor(dictionary=dictionary)
+
+
+def _adapt_datetime(value):
+    # Stored as naive UTC text, the same values MySQL keeps in a DATETIME,
+    # so string comparison in WHERE clauses orders correctly.
+    if value.tzinfo is not None:
+        value = value.astimezone(pytz.UTC).replace(tzinfo=None)
+    return value.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _convert_datetime(value):
+    return datetime.fromisoformat(value.decode())
+
+
+sqlite3.register_adapter(datetime, _adapt_datetime)
+sqlite3.register_converter("DATETIME", _convert_datetime)
+
+
+class _SQLiteCursor(sqlite3.Cursor):
+    """Accepts the %s placeholders the queries are written with."""
+
+    def execute(self, query, params=()):
+        return super().execute(query.replace("%s", "?"), params)
+
+    def executemany(self, query, seq_of_params):
+        return super().executemany(query.replace("%s", "?"), seq_of_params)
+
+
+def _dict_row(cur, row):
+    return {column[0]: value for column, value in zip(cur.description, row)}
+
+
+class SQLiteBackend:
+    """Embedded single-file backend for small deployments and local testing.
+
+    One connection per thread (the db executor threads), in WAL mode so the
+    engine's reads don't block handler writes.
+    """
+    dialect = "sqlite"
+
+    def __init__(self, path=SQLITE_PATH):
+        self.path = path
+        self._local = threading.local()
+
+    def get_connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=POOL_TIMEOUT, detect_types=sqlite3.PARSE_DECLTYPES)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA cache_size=-65536")  # 64 MB page cache
+            self._local.conn = conn
+        return conn
+
+    def release(self, conn):
+        pass  # the thread keeps its connection
+
+    def cursor(self, conn, dictionary=False):
+        cur = conn.cursor(_SQLiteCursor)
+        if dictionary:
+            cur.row_factory = _dict_row
+        return cur
+
+
+def create_backend(name=DB_BACKEND):
+    if name == "sqlite":
+        return SQLiteBackend()
+    if name == "mysql":
+        return MySQLBackend()
+    raise ValueError(f"Unknown DB_BACKEND: {name}")
+
+
+backend = create_backend()
+
+
+def set_backend(new_backend):
+    global backend
+    backend = new_backend
+
+
+def get_connection():
+    return backend.get_connection()
+
+
+@contextmanager
+def connection():
+    conn = backend.get_connection()
+    try:
+        yield conn
+    finally:
+        backend.release(conn)
+
+
+@contextmanager
+def cursor(dictionary=False, commit=False):
+    """Yield a cursor on a connection from the configured backend.
+
+    With commit=True the transaction is committed when the block exits
+    cleanly; any exception rolls it back. The connection is always
+    released.
+    """
+    with connection() as conn:
+        cur = backend.cursor(conn, dictionary=dictionary)
+        try:
+            yield cur
+            if commit:
+                conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
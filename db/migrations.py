@@ -0,0 +1,224 @@
+"""Versioned schema migrations and a startup query-plan self-check.
+
+Each migration runs once and is recorded in schema_migrations. Steps are
+written to be safe on databases whose tables were created by hand before
+migrations existed. Both functions take any DB-API connection plus its
+dialect ("mysql" or "sqlite"), so they can be exercised against SQLite.
+"""
+import logging
+from datetime import datetime
+import pytz
+from recurrence import next_occurrence
+
+logger = logging.getLogger(__name__)
+
+
+def _sql(dialect, query):
+    return query.replace("%s", "?") if dialect == "sqlite" else query
+
+
+def _to_datetime(value):
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+
+def _has_column(cur, dialect, table, column):
+    if dialect == "sqlite":
+        cur.execute(f"PRAGMA table_info({table})")
+        return any(row[1] == column for row in cur.fetchall())
+    cur.execute(
+        "SELECT COUNT(*) FROM information_schema.columns "
+        "WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s",
+        (table, column)
+    )
+    return cur.fetchone()[0] > 0
+
+
+def _create_index(cur, dialect, table, name, columns):
+    if dialect == "sqlite":
+        cur.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})")
+        return
+    cur.execute(
+        "SELECT COUNT(*) FROM information_schema.statistics "
+        "WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s",
+        (table, name)
+    )
+    if cur.fetchone()[0] == 0:
+        cur.execute(f"CREATE INDEX {name} ON {table} ({columns})")
+
+
+def _create_tables(cur, dialect):
+    if dialect == "sqlite":
+        cur.execute(
+            "CREATE TABLE IF NOT EXISTS reminders ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "chat_id INTEGER NOT NULL, "
+            "user_id INTEGER NOT NULL, "
+            "remind_text TEXT NOT NULL, "
+            "run_at DATETIME NOT NULL, "
+            "recurrence VARCHAR(16) NOT NULL DEFAULT 'once')"
+        )
+        cur.execute(
+            "CREATE TABLE IF NOT EXISTS user_settings ("
+            "user_id INTEGER PRIMARY KEY, "
+            "timezone VARCHAR(64) NOT NULL)"
+        )
+        return
+    cur.execute(
+        "CREATE TABLE IF NOT EXISTS reminders ("
+        "id BIGINT AUTO_INCREMENT PRIMARY KEY, "
+        "chat_id BIGINT NOT NULL, "
+        "user_id BIGINT NOT NULL, "
+        "remind_text TEXT NOT NULL, "
+        "run_at DATETIME NOT NULL, "
+        "recurrence VARCHAR(16) NOT NULL DEFAULT 'once'"
+        ") ENGINE=InnoDB DEFAULT CHARSET=utf8mb4"
+    )
+    cur.execute(
+        "CREATE TABLE IF NOT EXISTS user_settings ("
+        "user_id BIGINT PRIMARY KEY, "
+        "timezone VARCHAR(64) NOT NULL"
+        ") ENGINE=InnoDB DEFAULT CHARSET=utf8mb4"
+    )
+
+
+def _add_next_run_at(cur, dialect):
+    if not _has_column(cur, dialect, "reminders", "next_run_at"):
+        cur.execute("ALTER TABLE reminders ADD COLUMN next_run_at DATETIME NULL")
+    _create_index(cur, dialect, "reminders", "idx_reminders_next_run_at", "next_run_at")
+    cur.execute("UPDATE reminders SET next_run_at = run_at WHERE recurrence = 'once' AND next_run_at IS NULL")
+
+    cur.execute(
+        "SELECT r.id, r.run_at, r.recurrence, s.timezone FROM reminders r "
+        "LEFT JOIN user_settings s ON s.user_id = r.user_id "
+        "WHERE r.recurrence != 'once' AND r.next_run_at IS NULL"
+    )
+    now = datetime.now(pytz.UTC)
+    updates = [
+        (next_occurrence(recurrence, _to_datetime(run_at), timezone, now).replace(tzinfo=None), reminder_id)
+        for reminder_id, run_at, recurrence, timezone in cur.fetchall()
+    ]
+    if updates:
+        cur.executemany(_sql(dialect, "UPDATE reminders SET next_run_at = %s WHERE id = %s"), updates)
+        logger.info("Backfilled next_run_at for %d recurring reminders", len(updates))
+
+
+def _add_hot_query_indexes(cur, dialect):
+    # /reminder_list: chat_id = ? AND run_at > ? ORDER BY run_at, id
+    _create_index(cur, dialect, "reminders", "idx_reminders_chat_run_at", "chat_id, run_at")
+    # /timezone reschedules a user's recurring reminders
+    _create_index(cur, dialect, "reminders", "idx_reminders_user", "user_id")
+
+
+def _add_claim_columns(cur, dialect):
+    # Delivery leases: a worker owns a due reminder until lease_until.
+    if not _has_column(cur, dialect, "reminders", "claimed_by"):
+        cur.execute("ALTER TABLE reminders ADD COLUMN claimed_by VARCHAR(64) NULL")
+    if not _has_column(cur, dialect, "reminders", "lease_until"):
+        cur.execute("ALTER TABLE reminders ADD COLUMN lease_until DATETIME NULL")
+
+
+# (version, description, step); append new migrations, never edit applied ones.
+MIGRATIONS = [
+    (1, "create reminders and user_settings", _create_tables),
+    (2, "reminders.next_run_at with index and backfill", _add_next_run_at),
+    (3, "composite indexes for hot reminder queries", _add_hot_query_indexes),
+    (4, "reminders.claimed_by and lease_until for multi-worker delivery", _add_claim_columns),
+]
+
+
+def migrate(conn, dialect="mysql"):
+    """Apply pending migrations in order; returns the versions applied."""
+    cur = conn.cursor()
+    if dialect == "mysql":
+        # Several bot processes may start at once; only one migrates.
+        cur.execute("SELECT GET_LOCK('takonaut_migrations', 60)")
+        cur.fetchall()
+    try:
+        cur.execute(
+            "CREATE TABLE IF NOT EXISTS schema_migrations ("
+            "version INTEGER PRIMARY KEY, description VARCHAR(255) NOT NULL, applied_at DATETIME NOT NULL)"
+        )
+        conn.commit()
+        cur.execute("SELECT version FROM schema_migrations")
+        done = {row[0] for row in cur.fetchall()}
+        applied = []
+        for version, description, step in MIGRATIONS:
+            if version in done:
+                continue
+            logger.info("Applying migration %d: %s", version, description)
+            step(cur, dialect)
+            cur.execute(
+                _sql(dialect, "INSERT INTO schema_migrations (version, description, applied_at) VALUES (%s, %s, %s)"),
+                (version, description, datetime.utcnow().replace(microsecond=0))
+            )
+            conn.commit()
+            applied.append(version)
+        return applied
+    finally:
+        if dialect == "mysql":
+            cur.execute("SELECT RELEASE_LOCK('takonaut_migrations')")
+            cur.fetchall()
+        cur.close()
+
+
+# (name, query, sample params) for the queries the bot runs constantly, as
+# reminder_db and user_settings_db issue them.
+_T = "2000-01-01 00:00:00"
+HOT_QUERIES = [
+    ("engine refill",
+     "SELECT id FROM reminders WHERE next_run_at <= %s ORDER BY next_run_at", (_T,)),
+    ("claim due reminders",
+     "UPDATE reminders SET claimed_by = %s, lease_until = %s WHERE id IN (%s, %s) AND next_run_at <= %s "
+     "AND (lease_until IS NULL OR lease_until < %s OR claimed_by = %s)", ("w", _T, 1, 2, _T, _T, "w")),
+    ("read back claims",
+     "SELECT id, claimed_by FROM reminders WHERE id IN (%s, %s) AND next_run_at <= %s", (1, 2, _T)),
+    ("renew leases",
+     "UPDATE reminders SET lease_until = %s WHERE id IN (%s, %s) AND claimed_by = %s", (_T, 1, 2, "w")),
+    ("count chat reminders",
+     "SELECT COUNT(*) FROM reminders WHERE chat_id = %s AND run_at > %s", (0, _T)),
+    ("chat reminder page",
+     "SELECT id, remind_text, run_at, recurrence FROM reminders WHERE chat_id = %s AND run_at > %s "
+     "AND (run_at > %s OR (run_at = %s AND id > %s)) ORDER BY run_at, id LIMIT %s", (0, _T, _T, _T, 0, 5)),
+    ("chat reminder page, last",
+     "SELECT id, remind_text, run_at, recurrence FROM reminders WHERE chat_id = %s AND run_at > %s "
+     "ORDER BY run_at DESC, id DESC LIMIT %s", (0, _T, 5)),
+    ("user's recurring reminders",
+     "SELECT id, chat_id, user_id, remind_text, run_at, recurrence, next_run_at FROM reminders "
+     "WHERE user_id = %s AND recurrence != 'once'", (0,)),
+    ("user timezones",
+     "SELECT user_id, timezone FROM user_settings WHERE user_id IN (%s, %s)", (0, 1)),
+]
+
+
+def check_query_plans(conn, dialect="mysql"):
+    """EXPLAIN each hot query and warn about full table scans; returns the offenders."""
+    cur = conn.cursor()
+    full_scans = []
+    try:
+        for name, query, params in HOT_QUERIES:
+            if dialect == "sqlite":
+                cur.execute("EXPLAIN QUERY PLAN " + _sql(dialect, query), params)
+                # detail is e.g. "SCAN reminders" (full scan) or "SEARCH reminders USING INDEX ..."
+                plan = [row[-1] for row in cur.fetchall()]
+                scans = [step for step in plan if step.startswith("SCAN") and "USING" not in step]
+            else:
+                cur.execute("EXPLAIN " + query, params)
+                columns = [c[0] for c in cur.description]
+                plan = [dict(zip(columns, row)) for row in cur.fetchall()]
+                # type ALL with no usable key is a real full scan, not the optimizer
+                # merely preferring one on a tiny table.
+                scans = [step for step in plan if step.get("type") == "ALL" and not step.get("possible_keys")]
+            if scans:
+                full_scans.append(name)
+                logger.warning("Query plan check: '%s' does a full table scan: %s", name, scans)
+    finally:
+        cur.close()
+    return full_scans
+
+
+def ensure_schema():
+    """Migrate the configured database and check the hot query plans."""
+    from . import connection
+    with connection.connection() as conn:
+        migrate(conn, connection.backend.dialect)
+        check_query_plans(conn, connection.backend.dialect)
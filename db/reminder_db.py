@@ -1,75 +1,142 @@
-import mysql.connector
-from datetime import datetime, timedelta
+from datetime import datetime
 import pytz
+from .connection import cursor
 
-db_config = {
-    "host": "localhost",
-    "user": "root",
-    "password": "aSSaMYbALpGe42zR",  # set yours
-    "database": "takonaut"
-}
+def add_reminder(chat_id, user_id, text, run_at, recurrence="once", next_run_at=None):
+    with cursor(commit=True) as cur:
+        cur.execute(
+            "INSERT INTO reminders (chat_id, user_id, remind_text, run_at, recurrence, next_run_at) VALUES (%s, %s, %s, %s, %s, %s)",
+            (chat_id, user_id, text, run_at, recurrence, next_run_at or run_at)
+        )
+        return cur.lastrowid
 
-def get_connection():
-    return mysql.connector.connect(**db_config)
+def delete_reminder_by_id(reminder_id, chat_id):
+    with cursor(commit=True) as cur:
+        cur.execute("DELETE FROM reminders WHERE id = %s AND chat_id = %s", (reminder_id, chat_id))
+        return cur.rowcount > 0
 
-def add_reminder(chat_id, user_id, text, run_at, recurrence="once"):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        "INSERT INTO reminders (chat_id, user_id, remind_text, run_at, recurrence) VALUES (%s, %s, %s, %s, %s)",
-        (chat_id, user_id, text, run_at, recurrence)
-    )
-    conn.commit()
-    cursor.close()
-    conn.close()
+def get_upcoming_reminders(until):
+    """Reminders whose next fire time is at or before `until`, overdue ones included."""
+    with cursor(dictionary=True) as cur:
+        cur.execute(
+            "SELECT id, chat_id, user_id, remind_text, run_at, recurrence, next_run_at FROM reminders "
+            "WHERE next_run_at <= %s ORDER BY next_run_at",
+            (until,)
+        )
+        return cur.fetchall()
 
-def get_due_reminders():
-    now_utc = datetime.utcnow().replace(tzinfo=pytz.UTC)
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("SELECT * FROM reminders WHERE run_at <= %s AND recurrence = 'once'", (now_utc,))
-    results = cursor.fetchall()
-    cursor.close()
-    conn.close()
-    return results
+def set_next_run_at(reminder_id, next_run_at):
+    with cursor(commit=True) as cur:
+        cur.execute("UPDATE reminders SET next_run_at = %s WHERE id = %s", (next_run_at, reminder_id))
+
+def get_recurring_reminders_by_user(user_id):
+    with cursor(dictionary=True) as cur:
+        cur.execute(
+            "SELECT id, chat_id, user_id, remind_text, run_at, recurrence, next_run_at FROM reminders "
+            "WHERE user_id = %s AND recurrence != 'once'",
+            (user_id,)
+        )
+        return cur.fetchall()
+
+BATCH_SIZE = 1000  # rows per statement for the bulk helpers below
+
+def add_reminders(rows):
+    """Bulk insert (chat_id, user_id, text, run_at, recurrence, next_run_at) tuples in one transaction."""
+    with cursor(commit=True) as cur:
+        for i in range(0, len(rows), BATCH_SIZE):
+            cur.executemany(
+                "INSERT INTO reminders (chat_id, user_id, remind_text, run_at, recurrence, next_run_at) VALUES (%s, %s, %s, %s, %s, %s)",
+                rows[i:i + BATCH_SIZE]
+            )
+    return len(rows)
+
+def delete_reminders(reminder_ids):
+    """Delete many reminders with a few multi-row DELETE ... WHERE id IN (...) statements."""
+    reminder_ids = list(reminder_ids)
+    deleted = 0
+    with cursor(commit=True) as cur:
+        for i in range(0, len(reminder_ids), BATCH_SIZE):
+            chunk = reminder_ids[i:i + BATCH_SIZE]
+            placeholders = ", ".join(["%s"] * len(chunk))
+            cur.execute(f"DELETE FROM reminders WHERE id IN ({placeholders})", chunk)
+            deleted += cur.rowcount
+    return deleted
 
-def delete_reminder(reminder_id, chat_id):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM reminders WHERE id = %s AND chat_id = %s", (reminder_id, chat_id))
-    conn.commit()
-    cursor.close()
-    conn.close()
+def set_next_run_at_many(updates):
+    """Apply (next_run_at, reminder_id) pairs in a single transaction, releasing their leases."""
+    with cursor(commit=True) as cur:
+        cur.executemany(
+            "UPDATE reminders SET next_run_at = %s, claimed_by = NULL, lease_until = NULL WHERE id = %s",
+            list(updates)
+        )
 
+def claim_reminders(reminder_ids, worker_id, lease_until):
+    """Lease due reminders to worker_id so only one bot process sends them.
 
-def get_reminders_by_chat(chat_id):
+    A reminder can be claimed while it is due and unleased, its lease has
+    expired (the holder crashed), or worker_id already holds it. Returns
+    (claimed ids, ids still due but leased by another worker); ids in
+    neither were deleted or advanced by whoever delivered them.
+    """
+    reminder_ids = list(reminder_ids)
     now_utc = datetime.utcnow().replace(tzinfo=pytz.UTC)
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute(
-        "SELECT id, remind_text, run_at, recurrence FROM reminders WHERE chat_id = %s AND run_at > %s ORDER BY run_at",
-        (chat_id, now_utc)
-    )
-    results = cursor.fetchall()
-    cursor.close()
-    conn.close()
-    return results
+    claimed, held = set(), set()
+    with cursor(commit=True) as cur:
+        for i in range(0, len(reminder_ids), BATCH_SIZE):
+            chunk = reminder_ids[i:i + BATCH_SIZE]
+            placeholders = ", ".join(["%s"] * len(chunk))
+            cur.execute(
+                "UPDATE reminders SET claimed_by = %s, lease_until = %s "
+                f"WHERE id IN ({placeholders}) AND next_run_at <= %s "
+                "AND (lease_until IS NULL OR lease_until < %s OR claimed_by = %s)",
+                [worker_id, lease_until, *chunk, now_utc, now_utc, worker_id]
+            )
+            cur.execute(
+                f"SELECT id, claimed_by FROM reminders WHERE id IN ({placeholders}) AND next_run_at <= %s",
+                [*chunk, now_utc]
+            )
+            for reminder_id, claimed_by in cur.fetchall():
+                (claimed if claimed_by == worker_id else held).add(reminder_id)
+    return claimed, held
 
-def delete_reminder_by_id(reminder_id, chat_id):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM reminders WHERE id = %s AND chat_id = %s", (reminder_id, chat_id))
-    affected = cursor.rowcount
-    conn.commit()
-    cursor.close()
-    conn.close()
-    return affected > 0
+def renew_leases(reminder_ids, worker_id, lease_until):
+    """Extend worker_id's leases on reminders it is still sending."""
+    reminder_ids = list(reminder_ids)
+    with cursor(commit=True) as cur:
+        for i in range(0, len(reminder_ids), BATCH_SIZE):
+            chunk = reminder_ids[i:i + BATCH_SIZE]
+            placeholders = ", ".join(["%s"] * len(chunk))
+            cur.execute(
+                f"UPDATE reminders SET lease_until = %s WHERE id IN ({placeholders}) AND claimed_by = %s",
+                [lease_until, *chunk, worker_id]
+            )
+
+def count_reminders_by_chat(chat_id):
+    now_utc = datetime.utcnow().replace(tzinfo=pytz.UTC)
+    with cursor() as cur:
+        cur.execute("SELECT COUNT(*) FROM reminders WHERE chat_id = %s AND run_at > %s", (chat_id, now_utc))
+        return cur.fetchone()[0]
 
-def get_recurring_reminders():
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("SELECT * FROM reminders WHERE recurrence != 'once'")
-    results = cursor.fetchall()
-    cursor.close()
-    conn.close()
-    return results
+def get_reminders_page(chat_id, limit, after=None, before=None, last=False):
+    """One page of a chat's upcoming reminders ordered by (run_at, id).
+
+    Keyset pagination over the (chat_id, run_at) index: `after`/`before` are
+    (run_at, id) cursors from the neighbouring page; `last` fetches the tail.
+    """
+    now_utc = datetime.utcnow().replace(tzinfo=pytz.UTC)
+    query = "SELECT id, remind_text, run_at, recurrence FROM reminders WHERE chat_id = %s AND run_at > %s"
+    params = [chat_id, now_utc]
+    descending = last
+    if after is not None:
+        query += " AND (run_at > %s OR (run_at = %s AND id > %s))"
+        params += [after[0], after[0], after[1]]
+    elif before is not None:
+        query += " AND (run_at < %s OR (run_at = %s AND id < %s))"
+        params += [before[0], before[0], before[1]]
+        descending = True
+    query += " ORDER BY run_at DESC, id DESC LIMIT %s" if descending else " ORDER BY run_at, id LIMIT %s"
+    params.append(limit)
+    with cursor(dictionary=True) as cur:
+        cur.execute(query, params)
+        rows = cur.fetchall()
+    return rows[::-1] if descending else rows
@@ -1,21 +1,53 @@
-from .reminder_db import get_connection
+import os
+import pytz
+from cache import LRUCache
+from . import connection
+from .connection import cursor
+
+DEFAULT_TIMEZONE = "Asia/Jakarta"
+
+UPSERT_TIMEZONE = {
+    "mysql": "INSERT INTO user_settings (user_id, timezone) VALUES (%s, %s) "
+             "ON DUPLICATE KEY UPDATE timezone = VALUES(timezone)",
+    "sqlite": "INSERT INTO user_settings (user_id, timezone) VALUES (%s, %s) "
+              "ON CONFLICT(user_id) DO UPDATE SET timezone = excluded.timezone",
+}
+
+# Parsed pytz timezones by user id; set_user_timezone writes through.
+timezone_cache = LRUCache(maxsize=int(os.getenv("TIMEZONE_CACHE_SIZE", "10000")))
+
+def _parse(tz_name):
+    try:
+        return pytz.timezone(tz_name or DEFAULT_TIMEZONE)
+    except pytz.UnknownTimeZoneError:
+        return pytz.timezone(DEFAULT_TIMEZONE)
 
 def set_user_timezone(user_id, timezone):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        "INSERT INTO user_settings (user_id, timezone) VALUES (%s, %s) ON DUPLICATE KEY UPDATE timezone = VALUES(timezone)",
-        (user_id, timezone)
-    )
-    conn.commit()
-    cursor.close()
-    conn.close()
-
-def get_user_timezone(user_id):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT timezone FROM user_settings WHERE user_id = %s", (user_id,))
-    result = cursor.fetchone()
-    cursor.close()
-    conn.close()
-    return result[0] if result else "Asia/Jakarta"
+    with cursor(commit=True) as cur:
+        cur.execute(UPSERT_TIMEZONE[connection.backend.dialect], (user_id, timezone))
+    timezone_cache.set(user_id, _parse(timezone))
+
+def load_user_timezones(user_ids):
+    """Fetch timezones for many users with one IN (...) query and cache them."""
+    user_ids = list(dict.fromkeys(user_ids))
+    if not user_ids:
+        return {}
+    placeholders = ", ".join(["%s"] * len(user_ids))
+    with cursor() as cur:
+        cur.execute(f"SELECT user_id, timezone FROM user_settings WHERE user_id IN ({placeholders})", user_ids)
+        found = dict(cur.fetchall())
+    result = {}
+    for user_id in user_ids:
+        result[user_id] = _parse(found.get(user_id))
+        timezone_cache.set(user_id, result[user_id])
+    return result
+
+def cached_timezone(user_id):
+    """The cached timezone for user_id, or None; never touches the database."""
+    return timezone_cache.get(user_id)
+
+def get_user_tz(user_id):
+    tz = cached_timezone(user_id)
+    if tz is None:
+        tz = load_user_timezones([user_id])[user_id]
+    return tz
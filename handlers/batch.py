@@ -0,0 +1,64 @@
+import asyncio
+from telegram import Update
+from telegram.ext import ContextTypes
+from sender import sender
+from utils import convert_currency, convert_unit, format_rate, STALE_AFTER
+from rate_store import rate_store
+from rate_history import rate_history
+
+async def load_history(conversions):
+    """Historical rates the "... on YYYY-MM-DD" conversions need, read off the event loop."""
+    wanted = {parsed[1:] for kind, parsed in conversions if kind == "history"}
+    if not wanted:
+        return {}
+    return await asyncio.to_thread(lambda: {key: rate_history.rate_on(*key) for key in wanted})
+
+def convert_line(kind, parsed, snapshot, history=None):
+    """One Markdown line for a routed conversion, or None if it can't be converted.
+
+    History conversions look their rate up in `history`, from load_history().
+    """
+    amount, from_code, to_code = parsed[:3]
+    if kind == "history":
+        found = (history or {}).get(parsed[1:])
+        if found is None:
+            return None
+        return f"*{format_rate(amount)} {from_code}* = *{format_rate(amount * found[0])} {to_code}* on {parsed[3].isoformat()}"
+    if kind == "currency":
+        result, _, _ = convert_currency(amount, from_code, to_code, snapshot)
+    else:
+        result, rate = convert_unit(amount, from_code, to_code)
+        if result is not None and rate is None:  # temperature
+            return f"*{format_rate(amount)}° {from_code.upper()}* = *{format_rate(result)}° {to_code.upper()}*"
+    if result is None:
+        return None
+    return f"*{format_rate(amount)} {from_code}* = *{format_rate(result)} {to_code}*"
+
+async def handle_batch(update: Update, context: ContextTypes.DEFAULT_TYPE, conversions):
+    """Answer several routed conversions with one reply, all against one rate snapshot."""
+    snapshot = rate_store.snapshot()
+    history = await load_history(conversions)
+    lines = []
+    for kind, parsed in conversions:
+        amount, from_code, to_code = parsed[:3]
+        line = convert_line(kind, parsed, snapshot, history)
+        if line is None and kind == "history":
+            line = f"{format_rate(amount)} {from_code} → {to_code}: no rates recorded on {parsed[3].isoformat()}"
+        lines.append(line or f"{format_rate(amount)} {from_code} → {to_code}: not supported")
+    used_rates = any(kind == "currency" for kind, _ in conversions)
+
+    if used_rates and snapshot is not None:
+        time_str = snapshot.timestamp[:16].replace("T", " ") + " UTC"
+        lines.append(f"_(Rates last updated: {time_str})_")
+        age = snapshot.age()
+        if age > STALE_AFTER:
+            lines.append(f"⚠️ _Rates are {int(age // 3600)}h old, refresh pending._")
+
+    await sender.send_message(
+        context.bot,
+        chat_id=update.effective_chat.id,
+        text="\n".join(lines),
+        parse_mode="Markdown",
+        message_thread_id=update.message.message_thread_id,
+        reply_to_message_id=update.message.message_id
+    )
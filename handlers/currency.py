@@ -1,9 +1,13 @@
 from telegram import Update
 from telegram.ext import ContextTypes
-from utils import parse_message, convert_currency, format_rate
+from sender import sender
+from utils import parse_message, convert_currency, format_rate, STALE_AFTER
+from rate_store import rate_store
 
-async def handle_currency(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    parsed = parse_message(update.message.text)
+async def handle_currency(update: Update, context: ContextTypes.DEFAULT_TYPE, parsed=None):
+    # The router passes in what it already parsed.
+    if parsed is None:
+        parsed = parse_message(update.message.text)
     if not parsed:
         return
 
@@ -11,7 +15,8 @@ async def handle_currency(update: Update, context: ContextTypes.DEFAULT_TYPE):
     result, rate, timestamp = convert_currency(amount, from_cur, to_cur)
 
     if result is None:
-        await context.bot.send_message(
+        await sender.send_message(
+            context.bot,
             chat_id=update.effective_chat.id,
             text="Conversion failed. Check currency codes or try again later.",
             message_thread_id=update.message.message_thread_id,
@@ -25,8 +30,12 @@ async def handle_currency(update: Update, context: ContextTypes.DEFAULT_TYPE):
         f"`1 {from_cur} = {format_rate(rate)} {to_cur}`\n"
         f"_(Rates last updated: {time_str})_"
     )
+    age = rate_store.age()
+    if age is not None and age > STALE_AFTER:
+        msg += f"\n⚠️ _Rates are {int(age // 3600)}h old, refresh pending._"
 
-    await context.bot.send_message(
+    await sender.send_message(
+        context.bot,
         chat_id=update.effective_chat.id,
         text=msg,
         parse_mode="Markdown",
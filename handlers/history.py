@@ -0,0 +1,46 @@
+import asyncio
+from telegram import Update
+from telegram.ext import CommandHandler, ContextTypes
+from sender import sender
+from utils import format_rate
+from rate_history import rate_history
+
+MAX_TREND_DAYS = 3650
+
+async def trend_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    args = context.args
+    if len(args) not in (2, 3) or (len(args) == 3 and not args[2].isdigit()):
+        await update.message.reply_text("Usage: /trend <FROM> <TO> [days]\nExample: /trend USD IDR 90")
+        return
+
+    from_cur, to_cur = args[0].upper(), args[1].upper()
+    days = min(int(args[2]), MAX_TREND_DAYS) if len(args) == 3 else 30
+    stats = await asyncio.to_thread(rate_history.trend, from_cur, to_cur, max(days, 1))
+    if stats is None:
+        text = f"No {from_cur}/{to_cur} rates recorded in the last {days} days."
+    else:
+        def line(label, key):
+            rate, when = stats[key]
+            return f"{label}: `{format_rate(rate)}` ({when:%Y-%m-%d %H:%M} UTC)"
+
+        text = "\n".join([
+            f"*{from_cur} → {to_cur}, last {days} days*",
+            line("Now", "last"),
+            line("Low", "min"),
+            line("High", "max"),
+            f"Average: `{format_rate(stats['mean'])}`",
+            f"Change: `{stats['change'] * 100:+.2f}%` since {stats['first'][1]:%Y-%m-%d}",
+            f"_({stats['samples']} hourly samples)_",
+        ])
+
+    await sender.send_message(
+        context.bot,
+        chat_id=update.effective_chat.id,
+        text=text,
+        parse_mode="Markdown",
+        message_thread_id=update.message.message_thread_id,
+        reply_to_message_id=update.message.message_id
+    )
+
+def get_handler():
+    return CommandHandler("trend", trend_command)
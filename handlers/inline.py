@@ -0,0 +1,80 @@
+import asyncio
+import os
+import time
+from telegram import Update, InlineQueryResultArticle, InputTextMessageContent
+from telegram.ext import ContextTypes, InlineQueryHandler
+from cache import LRUCache
+from router import route_all
+from rate_store import rate_store
+from handlers.batch import convert_line, load_history
+
+INLINE_CACHE_TIME = int(os.getenv("INLINE_CACHE_TIME", "60"))  # seconds Telegram may reuse an answer
+INLINE_DEBOUNCE = float(os.getenv("INLINE_DEBOUNCE", "0.3"))  # seconds between keystrokes that count as typing
+
+# Answers by (normalized query, rates timestamp); a rate refresh changes the key.
+inline_cache = LRUCache(maxsize=int(os.getenv("INLINE_CACHE_SIZE", "5000")), ttl=INLINE_CACHE_TIME)
+
+_last_query = {}  # user_id -> (monotonic time, inline query id)
+
+
+def normalize(query):
+    return " ".join(query.lower().split())
+
+
+async def build_results(query):
+    """InlineQueryResultArticles for a query, or [] while it is not a complete conversion yet."""
+    text = normalize(query)
+    snapshot = rate_store.snapshot()
+    key = (text, snapshot.timestamp if snapshot else None)
+    results = inline_cache.get(key)
+    if results is not None:
+        return results
+
+    conversions = route_all(text)
+    history = await load_history(conversions)
+    results = []
+    for kind, parsed in conversions:
+        line = convert_line(kind, parsed, snapshot, history)
+        if line is None:
+            continue
+        title = line.replace("*", "")
+        if kind == "currency":
+            description = f"Rates updated {snapshot.timestamp[:16].replace('T', ' ')} UTC"
+        elif kind == "history":
+            description = f"Historical rate on {parsed[3].isoformat()}"
+        else:
+            description = "Unit conversion"
+        results.append(InlineQueryResultArticle(
+            id=str(len(results)),
+            title=title,
+            description=description,
+            input_message_content=InputTextMessageContent(line, parse_mode="Markdown"),
+        ))
+    inline_cache.set(key, results)
+    return results
+
+
+async def inline_query(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    query = update.inline_query
+    now = time.monotonic()
+    if len(_last_query) > 10000:
+        _last_query.clear()
+    previous = _last_query.get(query.from_user.id)
+    _last_query[query.from_user.id] = (now, query.id)
+
+    results = await build_results(query.query)
+    if not results:
+        return  # partial input like "100 usd to i"; a later keystroke gets answered
+
+    # Debounce: while the user is typing, only the last query of a burst is answered.
+    if previous is not None and now - previous[0] < INLINE_DEBOUNCE:
+        await asyncio.sleep(INLINE_DEBOUNCE)
+        if _last_query.get(query.from_user.id, (0, None))[1] != query.id:
+            return
+
+    await query.answer(results, cache_time=INLINE_CACHE_TIME, is_personal=False)
+
+
+def get_handler():
+    # block=False so a debounced query never holds up other updates.
+    return InlineQueryHandler(inline_query, block=False)
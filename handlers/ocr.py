@@ -0,0 +1,191 @@
+import asyncio
+import io
+import multiprocessing
+import os
+import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import numpy as np
+from PIL import Image, ImageEnhance, ImageOps
+from handlers.ocr_cleaner import clean_ocr_text
+
+TESSERACT_CMD = os.getenv("TESSERACT_CMD", "tesseract")
+
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", os.cpu_count() or 1))
+OCR_MAX_QUEUE = int(os.getenv("OCR_MAX_QUEUE", "8"))  # jobs allowed to wait for a worker
+OCR_TIMEOUT = float(os.getenv("OCR_TIMEOUT", "60"))  # seconds per job, OSD and OCR together
+OSD_SHARE = 0.25  # at most this much of a job's time goes to orientation detection
+
+TARGET_WIDTH = 1200  # images narrower than this are upscaled for Tesseract
+MAX_WIDTH = 2400  # wider text regions are downscaled to this
+ANALYSIS_WIDTH = 800
+EXIF_ORIENTATION = 0x0112
+TEXT_ROW_DENSITY = 0.005  # share of ink pixels for a row/column to count as text
+CROP_MARGIN = 16
+
+# Binarization tables for every threshold, so thresholding is a single
+# Image.point() table lookup instead of a Python call per pixel value.
+_BINARIZE_LUTS = [[0] * (t + 1) + [255] * (255 - t) for t in range(256)]
+_BINARIZE_LUTS_INVERTED = [[255] * (t + 1) + [0] * (255 - t) for t in range(256)]
+
+
+class OcrBusy(Exception):
+    pass
+
+
+def run_tesseract(img: Image.Image, args, timeout=0) -> str:
+    """Pipe an image through tesseract's stdin/stdout so nothing touches the disk."""
+    buf = io.BytesIO()
+    img.save(buf, format="PNG", compress_level=1)
+    result = subprocess.run(
+        [TESSERACT_CMD, "stdin", "stdout", *args],
+        input=buf.getvalue(),
+        capture_output=True,
+        timeout=timeout or None,
+        check=True,
+    )
+    return result.stdout.decode("utf-8", errors="replace")
+
+def detect_rotation(img: Image.Image, timeout=0) -> Image.Image:
+    try:
+        osd = run_tesseract(img, ["--psm", "0"], timeout)
+        angle = int([line for line in osd.split("\n") if "Rotate" in line][0].split(":")[-1].strip())
+        if angle != 0:
+            return img.rotate(-angle, expand=True)
+    except:
+        pass
+    return img
+
+def otsu_threshold(hist) -> int:
+    """Threshold that maximises between-class variance of a 256-bin histogram."""
+    hist = np.asarray(hist, dtype=np.float64)
+    levels = np.arange(256)
+    weight_bg = np.cumsum(hist)
+    weight_fg = weight_bg[-1] - weight_bg
+    sum_bg = np.cumsum(hist * levels)
+    mean_bg = sum_bg / np.maximum(weight_bg, 1)
+    mean_fg = (sum_bg[-1] - sum_bg) / np.maximum(weight_fg, 1)
+    variance = weight_bg * weight_fg * (mean_bg - mean_fg) ** 2
+    return int(np.argmax(variance))
+
+def text_bbox(ink: np.ndarray):
+    """Bounding box (left, top, right, bottom) of rows/columns dense enough to hold text."""
+    rows = np.flatnonzero(ink.mean(axis=1) > TEXT_ROW_DENSITY)
+    cols = np.flatnonzero(ink.mean(axis=0) > TEXT_ROW_DENSITY)
+    if rows.size == 0 or cols.size == 0:
+        return None
+    height, width = ink.shape
+    return (
+        max(0, cols[0] - CROP_MARGIN), max(0, rows[0] - CROP_MARGIN),
+        min(width, cols[-1] + 1 + CROP_MARGIN), min(height, rows[-1] + 1 + CROP_MARGIN),
+    )
+
+def preprocess_image(image_bytes, timeout=0):
+    """Binarized, cropped image ready for Tesseract; orientation detection gets `timeout`."""
+    img = Image.open(io.BytesIO(image_bytes))
+    # Let the JPEG decoder do the first downscale for huge photos.
+    img.draft("L", (MAX_WIDTH, MAX_WIDTH))
+    has_orientation = img.getexif().get(EXIF_ORIENTATION) is not None
+    img = ImageOps.exif_transpose(img).convert("L")
+    if not has_orientation and img.width >= 150 and img.height >= 150:
+        img = detect_rotation(img, timeout)
+
+    # Threshold and text region are measured on a reduced copy; that is plenty
+    # of resolution for a histogram and a bounding box.
+    factor = max(1, img.width // ANALYSIS_WIDTH)
+    sample = img.reduce(factor) if factor > 1 else img
+    threshold = otsu_threshold(sample.histogram())
+    pixels = np.asarray(sample)
+    # Tesseract wants dark text on a light background; flip light-on-dark images.
+    dark_background = (pixels > threshold).mean() < 0.5
+    ink = pixels > threshold if dark_background else pixels <= threshold
+    bbox = text_bbox(ink)
+    if bbox:
+        left, top, right, bottom = (v * factor for v in bbox)
+        img = img.crop((left, top, min(right, img.width), min(bottom, img.height)))
+
+    if img.width < TARGET_WIDTH or img.width > MAX_WIDTH:
+        width = TARGET_WIDTH if img.width < TARGET_WIDTH else MAX_WIDTH
+        img = img.resize((width, max(1, round(img.height * width / img.width))), Image.Resampling.LANCZOS)
+    img = ImageEnhance.Sharpness(img).enhance(2.5)
+    luts = _BINARIZE_LUTS_INVERTED if dark_background else _BINARIZE_LUTS
+    return img.point(luts[threshold])
+
+def ocr_job(image_bytes, lang, timeout=0):
+    """Preprocess and OCR one image held in memory. Runs inside a worker process.
+
+    `timeout` bounds the whole job: OSD gets a share of it and OCR whatever is left.
+    """
+    deadline = time.monotonic() + timeout if timeout else None
+    processed_img = preprocess_image(image_bytes, timeout * OSD_SHARE)
+    remaining = deadline - time.monotonic() if deadline else 0
+    if deadline and remaining <= 0:
+        raise TimeoutError("OCR job ran out of time in preprocessing")
+    try:
+        raw_text = run_tesseract(processed_img, ["-l", lang, "--psm", "6"], remaining)
+    except subprocess.TimeoutExpired:
+        raise TimeoutError("tesseract timed out")
+    return clean_ocr_text(raw_text.replace("|", "").strip(), lang)
+
+
+class OcrPool:
+    """Bounded process pool for OCR jobs.
+
+    At most `workers` jobs run at once and at most `max_queue` more may wait;
+    beyond that submit() raises OcrBusy instead of piling up work. A job counts
+    as pending until its worker is done with it, even if the caller gave up.
+    """
+
+    def __init__(self, workers=OCR_WORKERS, max_queue=OCR_MAX_QUEUE, timeout=OCR_TIMEOUT):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.pending = 0
+        self._executor = None
+
+    def queue_position(self):
+        """How many jobs a new submission would wait behind (0 = runs now)."""
+        return max(0, self.pending - self.workers + 1)
+
+    def is_full(self):
+        return self.pending >= self.workers + self.max_queue
+
+    def _release(self):
+        self.pending -= 1
+
+    def _on_done(self, loop):
+        try:
+            loop.call_soon_threadsafe(self._release)
+        except RuntimeError:
+            pass  # event loop already closed at shutdown
+
+    async def submit(self, image_bytes, lang):
+        if self.is_full():
+            raise OcrBusy()
+        if self._executor is None:
+            # The bot process runs gRPC and database threads; don't fork it.
+            # Workers re-import __main__, which is the bare main.py launcher.
+            context = multiprocessing.get_context("forkserver")
+            context.set_forkserver_preload(["handlers.ocr"])
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+        loop = asyncio.get_running_loop()
+        # Jobs ahead of us may each use a full timeout before a worker frees up.
+        rounds = self.queue_position() // self.workers + 1
+        # The job itself keeps to self.timeout, so a timed-out job also frees its worker.
+        future = self._executor.submit(ocr_job, image_bytes, lang, self.timeout)
+        self.pending += 1
+        future.add_done_callback(lambda _: self._on_done(loop))
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout * rounds + 5)
+        except BrokenProcessPool:
+            self._executor = None
+            raise
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+ocr_pool = OcrPool()
@@ -1,7 +1,11 @@
 from telegram import Update, ChatMember, InlineKeyboardMarkup, InlineKeyboardButton
 from telegram.ext import CommandHandler, CallbackQueryHandler, ContextTypes
-from db.reminder_db import add_reminder, get_reminders_by_chat, delete_reminder_by_id
-from db.user_settings_db import get_user_timezone
+from db.async_db import (
+    add_reminder, count_reminders_by_chat, get_reminders_page, delete_reminder_by_id, get_user_timezone, get_user_tz,
+)
+from cache import LRUCache
+from reminder_engine import engine as reminder_engine
+from recurrence import next_occurrence
 import pytz
 from datetime import datetime, timedelta
 import re
@@ -16,6 +20,11 @@ WEEKDAYS = {
     "thursday": 3, "friday": 4, "saturday": 5, "sunday": 6
 }
 
+PER_PAGE = 5
+
+# Reminder totals per chat, so page flips don't re-count; add/delete invalidate.
+reminder_totals = LRUCache(maxsize=1024, ttl=60)
+
 def parse_flexible_time(text: str, now: datetime, force_timezone: str = None) -> datetime | None:
     try:
         text = text.strip().lower()
@@ -136,7 +145,7 @@ async def remind_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         remind_time_local = gmt7.localize(datetime(year, month, day, 0, 0))
 
     else:
-        user_tz = pytz.timezone(get_user_timezone(user_id))
+        user_tz = await get_user_tz(user_id)
         remind_time_local = parse_flexible_time(first, datetime.now(user_tz))
         if not remind_time_local:
             await update.message.reply_text(
@@ -147,32 +156,63 @@ async def remind_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         message = ' '.join(context.args[1:])
 
     remind_time_utc = remind_time_local.astimezone(pytz.UTC)
-    add_reminder(chat_id, user_id, message, remind_time_utc, recurrence)
+    next_run_at = remind_time_utc
+    if recurrence != "once":
+        next_run_at = next_occurrence(recurrence, remind_time_utc, await get_user_timezone(user_id), datetime.now(pytz.UTC))
+    reminder_id = await add_reminder(chat_id, user_id, message, remind_time_utc, recurrence, next_run_at)
+    reminder_totals.pop(chat_id)
+    reminder_engine.schedule({
+        "id": reminder_id, "chat_id": chat_id, "user_id": user_id, "remind_text": message,
+        "run_at": remind_time_utc, "recurrence": recurrence, "next_run_at": next_run_at,
+    })
 
     await update.message.reply_text(
         f"✅ Reminder set for {remind_time_local.strftime('%Y-%m-%d %H:%M')} (Asia/Jakarta)\nRecurrence: `{recurrence}`",
         parse_mode="Markdown"
     )
 
+async def get_reminder_total(chat_id):
+    total = reminder_totals.get(chat_id)
+    if total is None:
+        total = await count_reminders_by_chat(chat_id)
+        reminder_totals.set(chat_id, total)
+    return total
+
+def encode_cursor(row):
+    return f"{int(row['run_at'].replace(tzinfo=pytz.UTC).timestamp())}_{row['id']}"
+
+def decode_cursor(ts, reminder_id):
+    return datetime.fromtimestamp(int(ts), tz=pytz.UTC), int(reminder_id)
+
 async def remind_list(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    return await show_reminders(update, context, page=1)
+    return await show_reminders(update, context)
 
-async def show_reminders(update: Update, context: ContextTypes.DEFAULT_TYPE, page=1):
+async def show_reminders(update: Update, context: ContextTypes.DEFAULT_TYPE, page=1, after=None, before=None, last=False):
     user_id = update.effective_user.id
-    tz_str = get_user_timezone(user_id)
-    tz = pytz.timezone(tz_str)
-    reminders = get_reminders_by_chat(update.effective_chat.id)
-    if not reminders:
-        await update.message.reply_text("No reminders set.")
+    chat_id = update.effective_chat.id
+    tz = await get_user_tz(user_id)
+    tz_str = tz.zone
+    total = await get_reminder_total(chat_id)
+    if not total:
+        await update.effective_message.reply_text("No reminders set.")
         return
 
-    total = len(reminders)
-    per_page = 5
-    pages = math.ceil(total / per_page)
+    pages = math.ceil(total / PER_PAGE)
+    if last:
+        page = pages
+        chunk = await get_reminders_page(chat_id, total - (pages - 1) * PER_PAGE, last=True)
+    else:
+        chunk = await get_reminders_page(chat_id, PER_PAGE, after=after, before=before)
+    if not chunk:
+        # The cursor ran off the end (reminders fired or were deleted): recount and show the tail.
+        reminder_totals.pop(chat_id)
+        total = await get_reminder_total(chat_id)
+        if not total:
+            await update.effective_message.reply_text("No reminders set.")
+            return
+        pages = page = math.ceil(total / PER_PAGE)
+        chunk = await get_reminders_page(chat_id, total - (pages - 1) * PER_PAGE, last=True)
     page = max(1, min(page, pages))
-    start = (page - 1) * per_page
-    end = start + per_page
-    chunk = reminders[start:end]
 
     offset = tz.utcoffset(datetime.now()).total_seconds() / 3600
     tz_display = f"GMT{'+' if offset >= 0 else ''}{int(offset)}"
@@ -186,12 +226,15 @@ async def show_reminders(update: Update, context: ContextTypes.DEFAULT_TYPE, pag
             f"🔁 {html_escape(r['recurrence'])}\n📌 {html_escape(r['remind_text'])}\n\n"
         )
 
+    # Prev/next carry a (run_at, id) cursor so the next page is a single indexed range read.
+    prev_data = f"remindlist_p_{page - 1}_{encode_cursor(chunk[0])}" if page > 1 else "remindlist_f"
+    next_data = f"remindlist_n_{page + 1}_{encode_cursor(chunk[-1])}" if page < pages else "remindlist_l"
     buttons = [
-        InlineKeyboardButton("⏪", callback_data="remindlist_1"),
-        InlineKeyboardButton("⬅️", callback_data=f"remindlist_{page-1 if page > 1 else 1}"),
+        InlineKeyboardButton("⏪", callback_data="remindlist_f"),
+        InlineKeyboardButton("⬅️", callback_data=prev_data),
         InlineKeyboardButton(f"{page}/{pages}", callback_data="noop"),
-        InlineKeyboardButton("➡️", callback_data=f"remindlist_{page+1 if page < pages else pages}"),
-        InlineKeyboardButton("⏩", callback_data=f"remindlist_{pages}")
+        InlineKeyboardButton("➡️", callback_data=next_data),
+        InlineKeyboardButton("⏩", callback_data="remindlist_l")
     ]
     if update.callback_query:
         await update.callback_query.edit_message_text(
@@ -212,8 +255,18 @@ async def handle_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
     data = update.callback_query.data
     if data.startswith("remindlist_"):
         await update.callback_query.answer()
-        page = int(data.split("_")[1])
-        await show_reminders(update, context, page)
+        parts = data.split("_")
+        if parts[1] == "l":
+            await show_reminders(update, context, last=True)
+        elif parts[1] in ("n", "p") and len(parts) == 5:
+            cursor = decode_cursor(parts[3], parts[4])
+            if parts[1] == "n":
+                await show_reminders(update, context, int(parts[2]), after=cursor)
+            else:
+                await show_reminders(update, context, int(parts[2]), before=cursor)
+        else:
+            # "remindlist_f", or an old "remindlist_<page>" button
+            await show_reminders(update, context)
     elif data == "noop":
         await update.callback_query.answer()
 
@@ -228,7 +281,10 @@ async def remind_delete(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     reminder_id = int(context.args[0])
     chat_id = update.effective_chat.id
-    success = delete_reminder_by_id(reminder_id, chat_id)
+    success = await delete_reminder_by_id(reminder_id, chat_id)
+    if success:
+        reminder_engine.cancel(reminder_id)
+        reminder_totals.pop(chat_id)
 
     if success:
         await update.message.reply_text(f"✅ Reminder `{reminder_id}` deleted.", parse_mode="Markdown")
@@ -6,7 +6,9 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
         "👋 Welcome to *TakoNautBot*!\n\n"
         "💱 *Currency Conversion:*\n"
         "`100 USD to IDR`\n"
-        "`2500 JPY to EUR`\n\n"
+        "`2500 JPY to EUR`\n"
+        "`100 USD to IDR on 2026-01-01`\n"
+        "`/trend USD IDR 90`\n\n"
         "📏 *Unit Conversion:*\n"
         "`170 cm to ft`\n"
         "`25 c to f`\n\n"
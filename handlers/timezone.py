@@ -1,7 +1,10 @@
 from telegram import Update
 from telegram.ext import CommandHandler, ContextTypes
 import pytz
-from db.user_settings_db import set_user_timezone
+from datetime import datetime
+from db.async_db import set_user_timezone, get_recurring_reminders_by_user, set_next_run_at
+from recurrence import next_occurrence
+from reminder_engine import engine as reminder_engine
 
 async def timezone_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if len(context.args) != 1:
@@ -13,7 +16,14 @@ async def timezone_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("❌ Invalid timezone. Use values like Asia/Tokyo, Asia/Jakarta.\nSee: https://en.wikipedia.org/wiki/List_of_tz_database_time_zones")
         return
 
-    set_user_timezone(update.effective_user.id, tz_input)
+    await set_user_timezone(update.effective_user.id, tz_input)
+
+    # Recurring reminders fire at local midnight, so move them to the new zone.
+    now = datetime.now(pytz.UTC)
+    for r in await get_recurring_reminders_by_user(update.effective_user.id):
+        r["next_run_at"] = next_occurrence(r["recurrence"], r["run_at"], tz_input, now)
+        await set_next_run_at(r["id"], r["next_run_at"])
+        reminder_engine.schedule(r)
     await update.message.reply_text(f"✅ Timezone set to `{tz_input}`", parse_mode="Markdown")
 
 def get_handler():
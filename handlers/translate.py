@@ -1,9 +1,7 @@
 from telegram import Update
 from telegram.ext import ContextTypes, CommandHandler
-from google.cloud import translate_v3 as translate
-from google.cloud.translate_v3 import TranslationServiceClient
-import html
-import os
+from translator import translate
+from sender import sender
 
 # Manual mapping for language aliases to Google Translate codes
 LANGUAGE_MAP = {
@@ -17,11 +15,7 @@ LANGUAGE_MAP = {
     'UK': 'uk', 'HI': 'hi'
 }
 
-PROJECT_ID = os.getenv("GOOGLE_CLOUD_PROJECT") or "zeta-verbena-258608"  # or your actual project ID
-LOCATION = "global"  # NMT default location
-
 async def translate_content(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    client = TranslationServiceClient()
     if not update.message.reply_to_message:
         await update.message.reply_text("Please reply to a text message with /tl <LANGCODE>, e.g. /tl EN")
         return
@@ -39,14 +33,7 @@ async def translate_content(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
 
     try:
-        parent = f"projects/{PROJECT_ID}/locations/{LOCATION}"
-        response = client.translate_text(
-            contents=[reply.text],
-            target_language_code=target_lang,
-            mime_type="text/plain",
-            parent=parent,
-        )
-        translated_text = html.unescape(response.translations[0].translated_text)
+        translated_text = await translate(reply.text, target_lang)
 
         send_kwargs = {
             "chat_id": update.effective_chat.id,
@@ -58,7 +45,7 @@ async def translate_content(update: Update, context: ContextTypes.DEFAULT_TYPE):
         if hasattr(reply, "message_thread_id") and reply.message_thread_id:
             send_kwargs["message_thread_id"] = reply.message_thread_id
 
-        await context.bot.send_message(**send_kwargs)
+        await sender.send_message(context.bot, **send_kwargs)
 
     except Exception as e:
         await update.message.reply_text("Failed to process translation.")
@@ -2,14 +2,12 @@ import os
 import subprocess
 import tempfile
 import asyncio
-import html
 import re
 
 from telegram import Update
 from telegram.ext import ContextTypes, CommandHandler
-from google.cloud import translate_v3 as translate
-from google.cloud.translate_v3 import TranslationServiceClient
 import openai
+from translator import translate
 
 openai.api_key = os.getenv("OPENAI_API_KEY")
 
@@ -24,9 +22,6 @@ LANGUAGE_MAP = {
     'UK': 'uk', 'HI': 'hi'
 }
 
-PROJECT_ID = os.getenv("GOOGLE_CLOUD_PROJECT") or "zeta-verbena-258608"
-LOCATION = "global"
-
 def get_handler():
     return CommandHandler("tlvoice", translate_media)
 
@@ -108,20 +103,8 @@ async def process_translation(update: Update, context: ContextTypes.DEFAULT_TYPE
 
         formatted_transcript = format_paragraphs(full_text)
 
-        client = TranslationServiceClient()
-        parent = f"projects/{PROJECT_ID}/locations/{LOCATION}"
-
         try:
-            response = await asyncio.get_event_loop().run_in_executor(
-                None,
-                lambda: client.translate_text(
-                    contents=[full_text],
-                    target_language_code=target_lang,
-                    mime_type="text/plain",
-                    parent=parent
-                )
-            )
-            translated_text = html.unescape(response.translations[0].translated_text)
+            translated_text = await translate(full_text, target_lang)
             formatted_translation = format_paragraphs(translated_text)
         except Exception as e:
             formatted_translation = "(Translation failed)"
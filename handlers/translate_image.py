@@ -1,11 +1,10 @@
 from telegram import Update
 from telegram.ext import ContextTypes, CommandHandler
-from PIL import Image, ImageEnhance
-import pytesseract
-import os
-import html
-from google.cloud.translate_v3 import TranslationServiceClient
-from handlers.ocr_cleaner import clean_ocr_text
+import asyncio
+from handlers.ocr import ocr_pool, OcrBusy
+from translator import translate
+from sender import sender
+from cache import LRUCache
 
 # Google Translate language codes (ISO 639-1)
 LANGUAGE_MAP = {
@@ -35,8 +34,8 @@ GOOGLE_TO_TESSERACT_LANG_MAP = {
     'ur': 'urd', 'vi': 'vie', 'zh': 'chi_sim'
 }
 
-PROJECT_ID = os.getenv("GOOGLE_CLOUD_PROJECT") or "zeta-verbena-258608"
-LOCATION = "global"
+# OCR output keyed by (file_unique_id, tesseract lang); a repeated /tlpic skips Tesseract.
+ocr_cache = LRUCache(maxsize=512, ttl=24 * 3600)
 
 def get_google_lang_code(code: str) -> str:
     return LANGUAGE_MAP.get(code.upper(), code.lower())
@@ -62,29 +61,27 @@ async def translate_picture(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     try:
         if photo or (document and document.mime_type.startswith("image/")):
-            file = await context.bot.get_file(photo[-1].file_id if photo else document.file_id)
-            img_path = f"temp_{update.message.message_id}.jpg"
-            await file.download_to_drive(img_path)
-
-            processed_img = preprocess_image(img_path)
-            os.remove(img_path)
-
-            raw_text = pytesseract.image_to_string(processed_img, lang=image_lang_code, config="--psm 6")
-            text = clean_ocr_text(raw_text.replace("|", "").strip(), image_lang_code)
+            image = photo[-1] if photo else document
+            ocr_key = (image.file_unique_id, image_lang_code)
+            text = ocr_cache.get(ocr_key)
+            if text is None:
+                if ocr_pool.is_full():
+                    await update.message.reply_text("OCR is busy right now, please try again in a moment.")
+                    return
+                position = ocr_pool.queue_position()
+                if position:
+                    await update.message.reply_text(f"⏳ OCR busy, position {position} in queue.")
+
+                file = await context.bot.get_file(image.file_id)
+                image_bytes = bytes(await file.download_as_bytearray())
+                text = await ocr_pool.submit(image_bytes, image_lang_code)
+                ocr_cache.set(ocr_key, text)
 
             if not text:
                 await update.message.reply_text("No readable text found in the image.")
                 return
 
-            client = TranslationServiceClient()
-            parent = f"projects/{PROJECT_ID}/locations/{LOCATION}"
-            response = client.translate_text(
-                contents=[text],
-                target_language_code=target_lang,
-                mime_type="text/plain",
-                parent=parent
-            )
-            translated_text = html.unescape(response.translations[0].translated_text)
+            translated_text = await translate(text, target_lang)
 
             send_kwargs = {
                 "chat_id": update.effective_chat.id,
@@ -96,32 +93,17 @@ async def translate_picture(update: Update, context: ContextTypes.DEFAULT_TYPE):
             if hasattr(reply, "message_thread_id") and reply.message_thread_id:
                 send_kwargs["message_thread_id"] = reply.message_thread_id
 
-            await context.bot.send_message(**send_kwargs)
+            await sender.send_message(context.bot, **send_kwargs)
 
         else:
             await update.message.reply_text("You must reply to an image (photo or image document).")
 
+    except OcrBusy:
+        await update.message.reply_text("OCR is busy right now, please try again in a moment.")
+    except asyncio.TimeoutError:
+        await update.message.reply_text("OCR took too long on this image. Try a smaller or clearer one.")
     except Exception:
         await update.message.reply_text("An error occurred while translating the image.")
 
-def detect_rotation(img: Image.Image) -> Image.Image:
-    try:
-        osd = pytesseract.image_to_osd(img)
-        angle = int([line for line in osd.split("\n") if "Rotate" in line][0].split(":")[-1].strip())
-        if angle != 0:
-            return img.rotate(-angle, expand=True)
-    except:
-        pass
-    return img
-
-def preprocess_image(img_path):
-    img = Image.open(img_path).convert("L")
-    if img.width >= 150 and img.height >= 150:
-        img = detect_rotation(img)
-    img = img.resize((1200, int(img.height * (1200 / img.width))))
-    img = ImageEnhance.Sharpness(img).enhance(2.5)
-    img = img.point(lambda p: 255 if p > 150 else 0)
-    return img
-
 def get_handler():
     return CommandHandler("tlpic", translate_picture)
@@ -1,9 +1,12 @@
 from telegram import Update
 from telegram.ext import ContextTypes
+from sender import sender
 from utils import parse_unit_message, convert_unit, format_rate
 
-async def handle_unit(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    parsed = parse_unit_message(update.message.text)
+async def handle_unit(update: Update, context: ContextTypes.DEFAULT_TYPE, parsed=None):
+    # The router passes in what it already parsed.
+    if parsed is None:
+        parsed = parse_unit_message(update.message.text)
     if not parsed:
         return
 
@@ -11,7 +14,8 @@ async def handle_unit(update: Update, context: ContextTypes.DEFAULT_TYPE):
     result, conversion_rate = convert_unit(amount, from_unit, to_unit)
 
     if result is None:
-        await context.bot.send_message(
+        await sender.send_message(
+            context.bot,
             chat_id=update.effective_chat.id,
             text="Unsupported unit. Try using 'kg', 'cm', 'mile', etc. Or try again later.",
             message_thread_id=update.message.message_thread_id,
@@ -19,7 +23,7 @@ async def handle_unit(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
         return
 
-    if from_unit in ["c", "f", "k"] or to_unit in ["c", "f", "k"]:
+    if conversion_rate is None:  # temperature
         msg = (
             f"*{format_rate(amount)}° {from_unit.upper()}* = *{format_rate(result)}° {to_unit.upper()}*"
         )
@@ -29,7 +33,8 @@ async def handle_unit(update: Update, context: ContextTypes.DEFAULT_TYPE):
             f"`1 {from_unit} = {format_rate(conversion_rate)} {to_unit}`"
         )
 
-    await context.bot.send_message(
+    await sender.send_message(
+        context.bot,
         chat_id=update.effective_chat.id,
         text=msg,
         parse_mode="Markdown",
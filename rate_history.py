@@ -0,0 +1,194 @@
+import fcntl
+import json
+import logging
+import os
+import tempfile
+import threading
+from datetime import datetime, timedelta, timezone
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+HISTORY_DIR = os.getenv("RATE_HISTORY_DIR", "rate_history")
+MAX_CURRENCIES = 256  # fixed row width; codes past this are not recorded
+
+
+def to_epoch(timestamp):
+    """ISO timestamp (naive means UTC, as rate_store writes them) -> unix seconds."""
+    dt = datetime.fromisoformat(timestamp)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp())
+
+
+class RateHistory:
+    """Append-only hourly exchange-rate history (at most one row per hour), memory-mapped for reads.
+
+    Each snapshot is one row of MAX_CURRENCIES float32 USD rates in the fixed
+    column order from currencies.json (NaN where a code has no rate), in
+    rates.f32, plus its unix time in times.i64. Queries bisect the sorted
+    times and slice the rows they need, so a range query over months only
+    touches those pages, never the whole file.
+    """
+
+    def __init__(self, directory=HISTORY_DIR):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._columns = None  # code -> column
+        self._mapped = (0, None, None)  # rows, times, rates
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def columns(self):
+        if self._columns is None:
+            try:
+                with open(self._path("currencies.json")) as f:
+                    codes = json.load(f)
+            except FileNotFoundError:
+                codes = []
+            self._columns = {code: i for i, code in enumerate(codes)}
+        return self._columns
+
+    def _save_columns(self, columns):
+        codes = sorted(columns, key=columns.get)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".currencies-", suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(codes, f)
+        os.replace(tmp_path, self._path("currencies.json"))
+        self._columns = columns
+
+    def _rows_on_disk(self):
+        try:
+            times = os.path.getsize(self._path("times.i64")) // 8
+            rates = os.path.getsize(self._path("rates.f32")) // (4 * MAX_CURRENCIES)
+        except FileNotFoundError:
+            return 0
+        return min(times, rates)
+
+    def arrays(self):
+        """(times, rates) memory maps over every complete row; empty arrays if none."""
+        rows = self._rows_on_disk()
+        if rows != self._mapped[0]:
+            # Another process may have added currencies along with the rows.
+            self._columns = None
+            while rows:
+                try:
+                    times = np.memmap(self._path("times.i64"), dtype=np.int64, mode="r", shape=(rows,))
+                    rates = np.memmap(self._path("rates.f32"), dtype=np.float32, mode="r", shape=(rows, MAX_CURRENCIES))
+                    break
+                except (ValueError, FileNotFoundError):
+                    # A writer dropped a torn row between the size check and the
+                    # map; map what is there now.
+                    rows = self._rows_on_disk()
+            self._mapped = (rows, times, rates) if rows else (0, None, None)
+        rows, times, rates = self._mapped
+        if rows == 0:
+            return np.empty(0, dtype=np.int64), np.empty((0, MAX_CURRENCIES), dtype=np.float32)
+        return times, rates
+
+    def __len__(self):
+        return self._rows_on_disk()
+
+    def append(self, timestamp, rates):
+        """Record one snapshot; returns False if the last one is from the same hour or later.
+
+        Bot processes may share the directory, so appends hold an exclusive
+        flock and re-read the files under it; keeping one row per hour means
+        two processes fetching the same hour don't both land in a trend.
+        """
+        epoch = to_epoch(timestamp)
+        os.makedirs(self.directory, exist_ok=True)
+        with self._lock, open(self._path(".lock"), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            self._columns = None
+            times, _ = self.arrays()
+            rows = len(times)
+            if rows and epoch // 3600 <= int(times[-1]) // 3600:
+                return False
+
+            columns = dict(self.columns())
+            for code in rates:
+                if code not in columns:
+                    if len(columns) >= MAX_CURRENCIES:
+                        logger.warning("Rate history is full, not recording %s", code)
+                        continue
+                    columns[code] = len(columns)
+            if len(columns) != len(self.columns()):
+                self._save_columns(columns)
+
+            row = np.full(MAX_CURRENCIES, np.nan, dtype=np.float32)
+            for code, rate in rates.items():
+                if code in columns:
+                    row[columns[code]] = rate
+
+            # Drop a torn row left by a crash mid-append, then write the rate
+            # row before its time so readers never see a time without a row.
+            for name, width in (("rates.f32", 4 * MAX_CURRENCIES), ("times.i64", 8)):
+                with open(self._path(name), "ab") as f:
+                    f.truncate(rows * width)
+            with open(self._path("rates.f32"), "ab") as f:
+                f.write(row.tobytes())
+            with open(self._path("times.i64"), "ab") as f:
+                f.write(np.int64(epoch).tobytes())
+        return True
+
+    def record(self, snapshot):
+        if snapshot is not None:
+            return self.append(snapshot.timestamp, snapshot.rates)
+        return False
+
+    def _cross(self, rates, from_cur, to_cur):
+        columns = self.columns()
+        if from_cur not in columns or to_cur not in columns:
+            return None
+        return rates[:, columns[to_cur]].astype(np.float64) / rates[:, columns[from_cur]]
+
+    def rate_on(self, from_cur, to_cur, day):
+        """(rate, datetime) from the last snapshot taken on `day` (a UTC date), or None."""
+        times, rates = self.arrays()
+        start = int(datetime(day.year, day.month, day.day, tzinfo=timezone.utc).timestamp())
+        i = int(np.searchsorted(times, start + 86400)) - 1
+        if i < 0 or times[i] < start:
+            return None
+        cross = self._cross(rates[i:i + 1], from_cur, to_cur)
+        if cross is None or not np.isfinite(cross[0]):
+            return None
+        return float(cross[0]), datetime.fromtimestamp(int(times[i]), tz=timezone.utc)
+
+    def series(self, from_cur, to_cur, start, end):
+        """(unix times, rates) of every snapshot in [start, end), as float64 arrays."""
+        times, rates = self.arrays()
+        i, j = np.searchsorted(times, [int(start.timestamp()), int(end.timestamp())])
+        cross = self._cross(rates[i:j], from_cur, to_cur)
+        if cross is None:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        keep = np.isfinite(cross)
+        return np.asarray(times[i:j])[keep], cross[keep]
+
+    def stats(self, from_cur, to_cur, start, end):
+        """Min, max, mean and first-to-last change over [start, end), or None without data."""
+        times, rates = self.series(from_cur, to_cur, start, end)
+        if len(rates) == 0:
+            return None
+        lo, hi = int(np.argmin(rates)), int(np.argmax(rates))
+
+        def at(i):
+            return datetime.fromtimestamp(int(times[i]), tz=timezone.utc)
+
+        return {
+            "samples": len(rates),
+            "first": (float(rates[0]), at(0)),
+            "last": (float(rates[-1]), at(-1)),
+            "min": (float(rates[lo]), at(lo)),
+            "max": (float(rates[hi]), at(hi)),
+            "mean": float(rates.mean()),
+            "change": float(rates[-1] / rates[0] - 1),
+        }
+
+    def trend(self, from_cur, to_cur, days, now=None):
+        now = now or datetime.now(timezone.utc)
+        return self.stats(from_cur, to_cur, now - timedelta(days=days), now)
+
+
+rate_history = RateHistory()
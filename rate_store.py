@@ -0,0 +1,98 @@
+import json
+import os
+import tempfile
+import threading
+import logging
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+CACHE_FILE = "usd_rates.json"
+
+
+class RateSnapshot:
+    """An immutable set of USD-based rates plus every cross rate between them."""
+
+    def __init__(self, timestamp, rates):
+        self.timestamp = timestamp
+        self.rates = dict(rates)
+        self.cross = {
+            (from_cur, to_cur): to_rate / from_rate
+            for from_cur, from_rate in self.rates.items() if from_rate
+            for to_cur, to_rate in self.rates.items()
+        }
+
+    def rate(self, from_cur, to_cur):
+        return self.cross.get((from_cur, to_cur))
+
+    def age(self):
+        """Seconds since these rates were fetched."""
+        return (datetime.utcnow() - datetime.fromisoformat(self.timestamp)).total_seconds()
+
+
+class RateStore:
+    """Process-wide exchange rates kept in memory.
+
+    Readers get whole snapshots, so a conversion never sees a half-applied
+    update. The JSON cache file stays the persisted copy used for warm starts
+    and is reloaded whenever its mtime changes.
+    """
+
+    def __init__(self, path=CACHE_FILE):
+        self.path = path
+        self._snapshot = None
+        self._mtime = None
+        self._lock = threading.Lock()
+
+    def update(self, timestamp, rates, mtime=None):
+        snapshot = RateSnapshot(timestamp, rates)
+        with self._lock:
+            self._snapshot = snapshot
+            self._mtime = mtime if mtime is not None else self._file_mtime()
+        return snapshot
+
+    def save(self, timestamp, rates):
+        """Persist a snapshot with a temp-file-then-rename write and publish it."""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".rates-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump({"timestamp": timestamp, "rates": rates}, f)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return self.update(timestamp, rates)
+
+    def snapshot(self):
+        mtime = self._file_mtime()
+        if mtime is not None and mtime != self._mtime:
+            self.reload()
+        return self._snapshot
+
+    def reload(self):
+        mtime = self._file_mtime()
+        if mtime is None:
+            return self._snapshot
+        try:
+            with open(self.path) as f:
+                cache = json.load(f)
+            return self.update(cache["timestamp"], cache["rates"], mtime)
+        except Exception:
+            logger.warning("Could not load rate snapshot from %s", self.path, exc_info=True)
+            with self._lock:
+                self._mtime = mtime
+            return self._snapshot
+
+    def age(self):
+        snapshot = self.snapshot()
+        return snapshot.age() if snapshot else None
+
+    def _file_mtime(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+
+rate_store = RateStore()
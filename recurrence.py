@@ -0,0 +1,43 @@
+from datetime import datetime, time, timedelta
+import pytz
+
+RECURRENCES = ("once", "daily", "weekly", "monthly", "yearly")
+DEFAULT_TIMEZONE = "Asia/Jakarta"
+
+# Long enough to reach the next 29 February for a yearly reminder.
+_MAX_SEARCH_DAYS = 8 * 366
+
+
+def _matches(recurrence, day, anchor):
+    if recurrence == "daily":
+        return True
+    if recurrence == "weekly":
+        return day.weekday() == anchor.weekday()
+    if recurrence == "monthly":
+        return day.day == anchor.day
+    if recurrence == "yearly":
+        return day.month == anchor.month and day.day == anchor.day
+    raise ValueError(f"Unknown recurrence: {recurrence}")
+
+
+def next_occurrence(recurrence, run_at, tz_name, after):
+    """Next local-midnight fire time strictly after `after`, returned in UTC.
+
+    Recurring reminders fire at 00:00 in the user's timezone; `run_at` (the
+    first occurrence, UTC) fixes the weekday, day of month or date. Months
+    without that day are skipped, as before.
+    """
+    tz = pytz.timezone(tz_name or DEFAULT_TIMEZONE)
+    if run_at.tzinfo is None:
+        run_at = run_at.replace(tzinfo=pytz.UTC)
+    if after.tzinfo is None:
+        after = after.replace(tzinfo=pytz.UTC)
+    anchor = run_at.astimezone(tz)
+    day = after.astimezone(tz).date()
+    for _ in range(_MAX_SEARCH_DAYS):
+        if _matches(recurrence, day, anchor):
+            fire_at = tz.normalize(tz.localize(datetime.combine(day, time.min)))
+            if fire_at > after:
+                return fire_at.astimezone(pytz.UTC)
+        day += timedelta(days=1)
+    raise ValueError(f"No {recurrence} occurrence found for {run_at}")
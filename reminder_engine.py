@@ -0,0 +1,286 @@
+import asyncio
+import heapq
+import logging
+import os
+import socket
+import time
+from datetime import datetime
+import pytz
+from telegram.error import BadRequest, Forbidden
+
+from db import async_db
+from recurrence import next_occurrence
+from sender import sender, BULK
+
+logger = logging.getLogger(__name__)
+
+HORIZON = 3600  # seconds of upcoming reminders kept in memory
+RETRY_DELAY = 60  # seconds before retrying a reminder that failed to send
+# A recurring reminder missed by more than this (e.g. bot was down) is skipped
+# rather than sent late; either way it is only ever sent once per catch-up.
+CATCHUP_GRACE = float(os.getenv("RECURRING_CATCHUP_GRACE", str(6 * 3600)))
+ACK_BATCH = 200  # delivered reminders acknowledged per DB round trip
+ACK_INTERVAL = 1.0  # seconds; slow deliveries still get acknowledged this often
+# Several bot processes can share one database: each claims due reminders
+# for LEASE seconds before sending and renews the lease while the batch is
+# still going out, so only a crashed worker's leases expire.
+WORKER_ID = os.getenv("WORKER_ID") or f"{socket.gethostname()}:{os.getpid()}"
+LEASE = float(os.getenv("REMINDER_LEASE", "300"))
+CLAIM_BATCH = 100  # reminders leased at a time, so a burst is shared between workers
+
+
+def to_timestamp(dt):
+    # MySQL hands back naive datetimes that are already UTC.
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=pytz.UTC)
+    return dt.timestamp()
+
+
+class ReminderEngine:
+    """Delivers reminders from an in-memory min-heap keyed by next_run_at.
+
+    Reminders due within the next HORIZON seconds are loaded once per
+    horizon through the next_run_at index; the engine then sleeps until
+    exactly the next deadline. schedule() and cancel() wake it up, so new or
+    deleted reminders take effect immediately without polling the table.
+    Recurring reminders are advanced to their next occurrence after sending.
+
+    Every process loads the same reminders, so due ones are leased in the
+    database before sending and only the worker holding the lease sends.
+    """
+
+    def __init__(self, horizon=HORIZON):
+        self.horizon = horizon
+        self.bot = None
+        self._heap = []  # (fire_at, reminder_id)
+        self._entries = {}  # reminder_id -> (fire_at, reminder)
+        self._horizon_end = 0.0
+        self._cancelled = set()  # ids cancelled while a refill query is in flight
+        self._inflight = set()  # ids being sent or waiting for their bulk ack
+        self._ack_deletes = []
+        self._ack_advances = []
+        self._last_ack_flush = time.monotonic()
+        self._deliveries = set()
+        self._wake = asyncio.Event()
+        self._task = None
+
+    def start(self, app):
+        self.bot = app.bot
+        self._task = app.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        # Cancelled deliveries still flush the acks they collected.
+        for task in list(self._deliveries):
+            task.cancel()
+        await asyncio.gather(*self._deliveries, return_exceptions=True)
+
+    def schedule(self, reminder):
+        """Track a reminder row (id, chat_id, user_id, remind_text, run_at, recurrence, next_run_at)."""
+        fire_at = to_timestamp(reminder["next_run_at"])
+        if fire_at > self._horizon_end:
+            # Picked up by the refill that covers its time; forget any earlier slot.
+            if self._entries.pop(reminder["id"], None) is not None:
+                self._wake.set()
+            return
+        self._entries[reminder["id"]] = (fire_at, reminder)
+        heapq.heappush(self._heap, (fire_at, reminder["id"]))
+        self._wake.set()
+
+    def cancel(self, reminder_id):
+        # Heap entries are dropped lazily when they surface.
+        self._cancelled.add(reminder_id)
+        if self._entries.pop(reminder_id, None) is not None:
+            self._wake.set()
+
+    async def run(self):
+        while True:
+            try:
+                now = time.time()
+                if now >= self._horizon_end:
+                    await self._refill(now)
+                await self._fire_due(time.time())
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Reminder engine iteration failed")
+                await asyncio.sleep(RETRY_DELAY)
+                continue
+
+            deadline = min(self._heap[0][0], self._horizon_end) if self._heap else self._horizon_end
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=max(0.0, deadline - time.time()))
+            except asyncio.TimeoutError:
+                pass
+
+    async def _refill(self, now):
+        # Move the horizon first so reminders added while the query runs are
+        # scheduled directly instead of falling between two refills.
+        previous_end, self._horizon_end = self._horizon_end, now + self.horizon
+        self._cancelled.clear()
+        until = datetime.fromtimestamp(self._horizon_end, tz=pytz.UTC)
+        try:
+            rows = await async_db.get_upcoming_reminders(until)
+        except Exception:
+            self._horizon_end = previous_end
+            raise
+        for r in rows:
+            if r["id"] not in self._entries and r["id"] not in self._cancelled and r["id"] not in self._inflight:
+                self.schedule(r)
+        logger.info("Reminder engine loaded %d reminders due before %s", len(rows), until)
+
+    def _pop_due(self, now):
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            fire_at, reminder_id = heapq.heappop(self._heap)
+            entry = self._entries.get(reminder_id)
+            if entry is None or entry[0] != fire_at:
+                continue  # cancelled or rescheduled
+            del self._entries[reminder_id]
+            due.append(entry[1])
+        return due
+
+    async def _fire_due(self, now):
+        due = self._pop_due(now)
+        if due:
+            # Deliver in the background so a slow, rate-limited chat never holds
+            # up the next deadline; in-flight ids are kept out of refills.
+            self._inflight.update(r["id"] for r in due)
+            task = asyncio.create_task(self._deliver(due, now))
+            self._deliveries.add(task)
+            task.add_done_callback(self._deliveries.discard)
+
+    async def _claim(self, due):
+        """Keep the due reminders this worker won the lease for."""
+        lease_until = datetime.fromtimestamp(time.time() + LEASE, tz=pytz.UTC)
+        try:
+            claimed, held = await async_db.claim_reminders([r["id"] for r in due], WORKER_ID, lease_until)
+        except Exception:
+            logger.exception("Could not claim due reminders")
+            for r in due:
+                self._retry(r, RETRY_DELAY)
+            return []
+        for r in due:
+            if r["id"] in held:
+                # Another worker is sending it; look again once its lease could have expired.
+                self._retry(r, LEASE)
+            elif r["id"] not in claimed:
+                self._inflight.discard(r["id"])  # already delivered elsewhere
+        return [r for r in due if r["id"] in claimed]
+
+    async def _deliver(self, due, now):
+        try:
+            for i in range(0, len(due), CLAIM_BATCH):
+                await self._deliver_batch(due[i:i + CLAIM_BATCH], now)
+        finally:
+            await self._flush_acks()
+
+    async def _deliver_batch(self, due, now):
+        # Claim only once the previous batch is sent; batches other workers
+        # claimed meanwhile come back as held.
+        due = await self._claim(due)
+        if not due:
+            return
+        # One IN (...) query for every timezone the recurring rows need. Read
+        # past the cache: /timezone may have been handled by another process.
+        try:
+            timezones = await async_db.load_user_timezones(
+                {r["user_id"] for r in due if r["recurrence"] != "once"}
+            )
+        except Exception:
+            logger.exception("Could not load timezones for due reminders")
+            for r in due:
+                self._retry(r, RETRY_DELAY)
+            return
+        # A rate-limited group can take longer than LEASE to get through a batch.
+        renewer = asyncio.create_task(self._renew_leases([r["id"] for r in due]))
+        try:
+            await asyncio.gather(*(self._send(r, now, timezones) for r in due))
+            await self._flush_acks()
+        finally:
+            renewer.cancel()
+
+    async def _renew_leases(self, ids):
+        while True:
+            await asyncio.sleep(LEASE / 3)
+            lease_until = datetime.fromtimestamp(time.time() + LEASE, tz=pytz.UTC)
+            try:
+                # Acknowledged rows have already released their lease and are skipped.
+                await async_db.renew_leases(ids, WORKER_ID, lease_until)
+            except Exception:
+                logger.exception("Could not renew reminder leases")
+
+    async def _send(self, r, now, timezones):
+        recurring = r["recurrence"] != "once"
+        late = now - to_timestamp(r["next_run_at"])
+        if recurring and late > CATCHUP_GRACE:
+            logger.info(f"Skipping recurring reminder {r['id']}, missed by {late / 3600:.1f}h")
+            await self._ack(r, timezones)
+            return
+
+        text = f"🔁 Recurring Reminder:\n{r['remind_text']}" if recurring else f"{r['remind_text']}"
+        try:
+            # The sender waits out RetryAfter itself, pausing the chat and
+            # re-queueing; the batch's leases are renewed meanwhile.
+            await sender.send_message(self.bot, priority=BULK, chat_id=r["chat_id"], text=text)
+        except (Forbidden, BadRequest) as e:
+            logger.warning(f"Dropping reminder {r['id']}: {e}")
+        except Exception as e:
+            logger.warning(f"Failed to send reminder {r['id']}: {e}")
+            self._retry(r, RETRY_DELAY)
+            return
+        await self._ack(r, timezones)
+
+    async def _ack(self, reminder, timezones):
+        """Queue a delivered reminder for deletion (once) or advancing (recurring)."""
+        if reminder["recurrence"] == "once":
+            self._ack_deletes.append(reminder)
+        else:
+            # Move to the next occurrence after now, skipping any missed ones.
+            next_run_at = next_occurrence(
+                reminder["recurrence"], reminder["run_at"], timezones[reminder["user_id"]].zone, datetime.now(pytz.UTC)
+            )
+            self._ack_advances.append(dict(reminder, next_run_at=next_run_at))
+        pending = len(self._ack_deletes) + len(self._ack_advances)
+        if pending >= ACK_BATCH or time.monotonic() - self._last_ack_flush >= ACK_INTERVAL:
+            await self._flush_acks()
+
+    async def _flush_acks(self):
+        deletes, self._ack_deletes = self._ack_deletes, []
+        advances, self._ack_advances = self._ack_advances, []
+        self._last_ack_flush = time.monotonic()
+        try:
+            if deletes:
+                await async_db.delete_reminders([r["id"] for r in deletes])
+            if advances:
+                await async_db.set_next_run_at_many([(r["next_run_at"], r["id"]) for r in advances])
+        except Exception:
+            # Put them back; the next flush retries the write.
+            self._ack_deletes.extend(deletes)
+            self._ack_advances.extend(advances)
+            logger.exception("Failed to acknowledge delivered reminders")
+            return
+        for r in deletes:
+            self._inflight.discard(r["id"])
+        for r in advances:
+            self._inflight.discard(r["id"])
+            if r["id"] not in self._cancelled:
+                self.schedule(r)
+
+    def _retry(self, reminder, delay):
+        fire_at = time.time() + delay
+        retry = dict(reminder, next_run_at=datetime.fromtimestamp(fire_at, tz=pytz.UTC))
+        self._inflight.discard(retry["id"])
+        self._entries[retry["id"]] = (fire_at, retry)
+        heapq.heappush(self._heap, (fire_at, retry["id"]))
+        self._wake.set()
+
+
+engine = ReminderEngine()
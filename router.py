@@ -0,0 +1,130 @@
+"""Routes plain chat messages to the currency or unit converter.
+
+Almost every group message is neither, so a cheap prefilter rejects it
+before any regex runs. A message that passes is matched once against the
+precompiled grammar, and the handler receives the parsed values instead of
+parsing again.
+"""
+import re
+from datetime import date
+import units
+from utils import UNIT_PATTERN
+
+# What parse_message accepts, anchored right after the amount UNIT_PATTERN found.
+_CURRENCY_TAIL = re.compile(r"\s*([a-zA-Z]{3})\s+to\s+([a-zA-Z]{3})", re.IGNORECASE)
+_ON_DATE = re.compile(r"\s+on\s+(\d{4}-\d{2}-\d{2})\s*$", re.IGNORECASE)
+
+
+def could_convert(text):
+    """Prefilter: conversions start with the amount and contain " to "."""
+    return text[:1].isdigit() and " to " in text.lower()
+
+
+def _split_date(text):
+    """Strip a trailing " on 2026-01-01" (historical rates) and return it as a date."""
+    match = _ON_DATE.search(text)
+    if match:
+        try:
+            return text[:match.start()], date.fromisoformat(match.group(1))
+        except ValueError:
+            pass
+    return text, None
+
+
+def _currency(amount, from_cur, to_cur, day):
+    if day is not None:
+        return "history", (amount, from_cur, to_cur, day)
+    return "currency", (amount, from_cur, to_cur)
+
+
+def route(text):
+    """Return ("currency" | "unit", (amount, from, to)), ("history", (amount, from, to, date)) or None.
+
+    Same results as parse_message, then parse_unit_message, for messages the
+    prefilter lets through, except that a pair of units of the same
+    dimension is never read as currency codes. A currency conversion ending in " on YYYY-MM-DD" asks
+    for that day's historical rate.
+    """
+    text = text.strip()
+    if not could_convert(text):
+        return None
+    text, day = _split_date(text)
+    return _route(text, day)
+
+
+def _convertible(from_unit, to_unit):
+    # "100 KGS to CUP" is som to pesos, not kilograms to cups.
+    return bool(from_unit and to_unit) and units.dimension(from_unit) == units.dimension(to_unit)
+
+
+def _route(text, day):
+    match = UNIT_PATTERN.match(text)
+    if match is None:
+        return None
+    amount = float(match.group(1))
+
+    from_unit = units.lookup(match.group(2))
+    to_unit = units.lookup(match.group(3))
+    currency = _CURRENCY_TAIL.match(text, match.end(1))
+    # Three-letter units ("mph to kph", "gal to cup") are not currency codes.
+    if currency and not _convertible(from_unit, to_unit):
+        return _currency(amount, currency.group(1).upper(), currency.group(2).upper(), day)
+    if from_unit and to_unit:
+        return "unit", (amount, from_unit, to_unit)
+    return None
+
+
+MAX_CONVERSIONS = 30  # per message; keeps the aggregated reply well under 4096 chars
+
+_EXPRESSION_SEP = re.compile(r"[\n;]+")
+_MULTI_TARGET = re.compile(r"(\d+(?:\.\d+)?)\s*([a-zA-Zµμ°/ ]+?)\s+to\s+(.+)", re.IGNORECASE)
+_TARGET_SEP = re.compile(r"\s*(?:,|&|\band\b)\s*", re.IGNORECASE)
+
+
+def _route_targets(expression, day):
+    """Expand "100 USD to IDR, EUR and JPY" into one conversion per target."""
+    match = _MULTI_TARGET.fullmatch(expression)
+    if match is None:
+        return None
+    targets = [t for t in _TARGET_SEP.split(match.group(3)) if t]
+    if len(targets) < 2:
+        return None
+    amount, source = float(match.group(1)), match.group(2).strip()
+    source_unit = units.lookup(source)
+    routed = []
+    for target in targets:
+        target_unit = units.lookup(target)
+        if _convertible(source_unit, target_unit):
+            routed.append(("unit", (amount, source_unit, target_unit)))
+        elif len(source) == 3 and len(target) == 3 and (source + target).isalpha():
+            routed.append(_currency(amount, source.upper(), target.upper(), day))
+        elif source_unit and target_unit:
+            routed.append(("unit", (amount, source_unit, target_unit)))
+        else:
+            return None  # not a clean target list; read it as a single conversion
+    return routed
+
+
+def route_all(text):
+    """Every conversion in a message, in order, at most MAX_CONVERSIONS.
+
+    Lines and ';'-separated parts are routed separately, and a list of
+    targets ("100 USD to IDR, EUR, JPY") yields one conversion per target.
+    A plain single conversion gives the same result as route().
+    """
+    if " to " not in text.lower():
+        return []
+    routed = []
+    for expression in _EXPRESSION_SEP.split(text):
+        expression = expression.strip()
+        if not could_convert(expression):
+            continue
+        expression, day = _split_date(expression)
+        expanded = _route_targets(expression, day)
+        if expanded is None:
+            single = _route(expression, day)
+            expanded = [single] if single else []
+        routed.extend(expanded)
+        if len(routed) >= MAX_CONVERSIONS:
+            return routed[:MAX_CONVERSIONS]
+    return routed
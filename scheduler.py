@@ -1,12 +1,25 @@
-from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 from utils import fetch_rates
+from rate_store import rate_store
+from rate_history import rate_history
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
 
+async def update_rates():
+    await fetch_rates()
+    # Append the hour's snapshot to the history; an hour already recorded is skipped.
+    try:
+        await asyncio.to_thread(rate_history.record, rate_store.snapshot())
+    except Exception:
+        logger.exception("Failed to record rate history")
+
 def start_scheduler():
-    scheduler = BackgroundScheduler()
-    scheduler.add_job(fetch_rates, CronTrigger(minute=1))  # every hour at :01
+    # Must be called from inside the running event loop (Application.post_init).
+    scheduler = AsyncIOScheduler()
+    scheduler.add_job(update_rates, CronTrigger(minute=1))  # every hour at :01
     scheduler.start()
-    logger.info("Scheduler started.")
\ No newline at end of file
+    logger.info("Scheduler started.")
+    return scheduler
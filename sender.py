@@ -0,0 +1,163 @@
+import asyncio
+import itertools
+import logging
+import os
+import time
+from telegram.error import RetryAfter
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = 0  # replies to a user who is waiting
+BULK = 1  # reminder fan-out and other background traffic
+
+# Telegram's limits are per bot, so processes sending as the same bot
+# (BOT_MODE=worker next to the main one) each get an equal share.
+SENDER_PROCESSES = max(1, int(os.getenv("SENDER_PROCESSES", "1")))
+GLOBAL_RATE = 30.0 / SENDER_PROCESSES  # messages per second across all chats
+GROUP_RATE = 20 / 60 / SENDER_PROCESSES  # messages per second in one group
+PRIVATE_RATE = 1.0 / SENDER_PROCESSES  # messages per second in one private chat
+CHAT_BURST = max(1, 3 // SENDER_PROCESSES)  # messages a quiet chat may get at once
+WORKERS = 4
+MAX_IDLE_BUCKETS = 10000
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    def wait_time(self):
+        """Seconds until a token is available (0 if one is available now)."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if now < self.paused_until:
+            return self.paused_until - now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+    def pause(self, seconds):
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def is_idle(self):
+        return self.wait_time() == 0 and self.tokens >= self.capacity
+
+
+class OutboundSender:
+    """Central send queue that keeps the bot under Telegram's rate limits.
+
+    Messages are prioritised (INTERACTIVE before BULK) and each send takes a
+    token from the global bucket and from its chat's bucket. A message whose
+    chat is out of tokens is parked until it has one instead of blocking the
+    queue, and RetryAfter pauses that chat and re-queues the message.
+    """
+
+    def __init__(self, workers=WORKERS):
+        self.workers = workers
+        self.global_bucket = TokenBucket(GLOBAL_RATE, GLOBAL_RATE)
+        self.chat_buckets = {}
+        self.sent = 0
+        self.retries = 0
+        self.latency_avg = 0.0
+        self.latency_max = 0.0
+        self.parked = 0
+        self._queue = None
+        self._tasks = []
+        self._seq = itertools.count()
+
+    def _chat_bucket(self, chat_id):
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket is None:
+            if len(self.chat_buckets) >= MAX_IDLE_BUCKETS:
+                self.chat_buckets = {k: b for k, b in self.chat_buckets.items() if not b.is_idle()}
+            # Negative chat ids and @usernames are groups and channels.
+            is_group = str(chat_id).startswith(("-", "@"))
+            bucket = TokenBucket(GROUP_RATE if is_group else PRIVATE_RATE, CHAT_BURST)
+            self.chat_buckets[chat_id] = bucket
+        return bucket
+
+    def start(self):
+        if self._queue is None:
+            self._queue = asyncio.PriorityQueue()
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+
+    async def send_message(self, bot, priority=INTERACTIVE, **kwargs):
+        """Queue bot.send_message(**kwargs) and return the sent Message."""
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        job = (bot, kwargs, future, time.monotonic())
+        self._queue.put_nowait((priority, next(self._seq), job))
+        return await future
+
+    def _requeue(self, item, delay):
+        self.parked += 1
+        asyncio.get_running_loop().call_later(delay, self._unpark, item)
+
+    def _unpark(self, item):
+        self.parked -= 1
+        if self._queue is not None:
+            self._queue.put_nowait(item)
+
+    async def _worker(self):
+        while True:
+            item = await self._queue.get()
+            _, _, (bot, kwargs, future, enqueued) = item
+            if future.done():
+                continue  # caller gave up
+            chat_bucket = self._chat_bucket(kwargs["chat_id"])
+            wait = chat_bucket.wait_time()
+            if wait > 0:
+                self._requeue(item, wait)
+                continue
+            wait = self.global_bucket.wait_time()
+            while wait > 0:
+                await asyncio.sleep(wait)
+                wait = self.global_bucket.wait_time()
+            chat_bucket.take()
+            self.global_bucket.take()
+
+            try:
+                message = await bot.send_message(**kwargs)
+            except RetryAfter as e:
+                retry_after = e.retry_after
+                seconds = retry_after.total_seconds() if hasattr(retry_after, "total_seconds") else retry_after
+                logger.warning(f"RetryAfter {seconds}s for chat {kwargs['chat_id']}")
+                chat_bucket.pause(seconds)
+                self.retries += 1
+                self._requeue(item, seconds)
+                continue
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+                continue
+
+            latency = time.monotonic() - enqueued
+            self.sent += 1
+            self.latency_avg += (latency - self.latency_avg) * 0.05
+            self.latency_max = max(self.latency_max, latency)
+            if not future.done():
+                future.set_result(message)
+
+    def stats(self):
+        return {
+            "queue_depth": (self._queue.qsize() if self._queue else 0) + self.parked,
+            "sent": self.sent,
+            "retries": self.retries,
+            "latency_avg": self.latency_avg,
+            "latency_max": self.latency_max,
+        }
+
+
+sender = OutboundSender()
@@ -0,0 +1,61 @@
+"""A local stand-in for the OpenExchangeRates latest.json endpoint.
+
+Answers with a scripted list of status codes (the last one repeats) and
+records when each request arrived. Point the bot at it for manual runs:
+
+    python -m tests.fake_oxr --port 8000
+    OPEN_EXCHANGE_URL=http://127.0.0.1:8000/api/latest.json python main.py
+"""
+import argparse
+import time
+from aiohttp import web
+
+PATH = "/api/latest.json"
+RATES = {"USD": 1.0, "EUR": 0.92, "IDR": 16250.0, "JPY": 151.3}
+
+
+class FakeOpenExchangeRates:
+    def __init__(self, statuses=(200,), rates=RATES):
+        self.statuses = list(statuses)
+        self.rates = dict(rates)
+        self.requests = []  # monotonic arrival times
+        self._runner = None
+        self.url = None
+
+    async def latest(self, request):
+        self.requests.append(time.monotonic())
+        status = self.statuses[min(len(self.requests), len(self.statuses)) - 1]
+        if status != 200:
+            return web.json_response({"error": True, "status": status}, status=status)
+        return web.json_response({"base": "USD", "timestamp": int(time.time()), "rates": self.rates})
+
+    def app(self):
+        app = web.Application()
+        app.router.add_get(PATH, self.latest)
+        return app
+
+    async def start(self, host="127.0.0.1", port=0):
+        self._runner = web.AppRunner(self.app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        self.url = f"http://{host}:{port}{PATH}"
+        return self.url
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--status", type=int, action="append", help="scripted status codes, in order")
+    args = parser.parse_args()
+    web.run_app(FakeOpenExchangeRates(args.status or [200]).app(), host="127.0.0.1", port=args.port)
+
+
+if __name__ == "__main__":
+    main()
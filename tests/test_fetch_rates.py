@@ -0,0 +1,105 @@
+"""utils.fetch_rates against the fake OpenExchangeRates server."""
+import asyncio
+import json
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+import utils
+from rate_store import rate_store
+from tests.fake_oxr import FakeOpenExchangeRates, RATES
+
+OLD_RATES = {"USD": 1.0, "EUR": 0.9}
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(rate_store, "path", str(tmp_path / "usd_rates.json"))
+    monkeypatch.setattr(rate_store, "_snapshot", None)
+    monkeypatch.setattr(rate_store, "_mtime", None)
+    monkeypatch.setattr(utils, "FETCH_BACKOFF", 0.05)
+    return rate_store
+
+
+def save_old(store, hours=5):
+    timestamp = (datetime.utcnow() - timedelta(hours=hours)).isoformat()
+    store.save(timestamp, OLD_RATES)
+    return timestamp
+
+
+def fetch(statuses, monkeypatch):
+    async def run():
+        server = FakeOpenExchangeRates(statuses)
+        monkeypatch.setattr(utils, "RATES_URL", await server.start())
+        try:
+            await utils.fetch_rates()
+        finally:
+            await utils.close_http_client()
+            await server.stop()
+        return server
+    return asyncio.run(run())
+
+
+def read_file(store):
+    with open(store.path) as f:
+        return json.load(f)
+
+
+def temp_files(store):
+    return [name for name in os.listdir(os.path.dirname(store.path)) if name.endswith(".tmp")]
+
+
+def test_retries_server_errors_with_backoff(store, monkeypatch):
+    server = fetch([500, 429, 503, 200], monkeypatch)
+
+    assert len(server.requests) == 4
+    gaps = [b - a for a, b in zip(server.requests, server.requests[1:])]
+    assert gaps[0] >= 0.05
+    assert gaps[1] > gaps[0] * 1.5 and gaps[2] > gaps[1] * 1.5
+    assert store.snapshot().rates == RATES
+    assert read_file(store)["rates"] == RATES
+    assert temp_files(store) == []
+
+
+def test_stops_on_client_error(store, monkeypatch):
+    timestamp = save_old(store)
+    server = fetch([401, 200], monkeypatch)
+
+    assert len(server.requests) == 1
+    assert store.snapshot().timestamp == timestamp
+    assert read_file(store) == {"timestamp": timestamp, "rates": OLD_RATES}
+
+
+def test_keeps_last_good_snapshot_when_retries_run_out(store, monkeypatch):
+    timestamp = save_old(store)
+    server = fetch([502], monkeypatch)
+
+    assert len(server.requests) == utils.FETCH_RETRIES
+    assert store.snapshot().rates == OLD_RATES
+    assert store.snapshot().timestamp == timestamp
+    assert store.age() > 4 * 3600
+
+
+def test_skips_when_rates_are_from_this_hour(store, monkeypatch):
+    store.save(datetime.utcnow().isoformat(), OLD_RATES)
+    server = fetch([200], monkeypatch)
+
+    assert server.requests == []
+    assert store.snapshot().rates == OLD_RATES
+
+
+def test_failed_write_leaves_previous_file(store, monkeypatch):
+    timestamp = save_old(store)
+
+    def torn_dump(obj, f):
+        f.write('{"timestamp": "')
+        raise OSError("disk full")
+
+    monkeypatch.setattr("rate_store.json.dump", torn_dump)
+    server = fetch([200], monkeypatch)
+
+    assert len(server.requests) == utils.FETCH_RETRIES  # each failed save is retried
+    assert read_file(store) == {"timestamp": timestamp, "rates": OLD_RATES}
+    assert store.snapshot().rates == OLD_RATES
+    assert temp_files(store) == []
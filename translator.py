@@ -0,0 +1,201 @@
+import os
+import html
+import time
+import asyncio
+import sqlite3
+import hashlib
+import logging
+import threading
+from google.cloud.translate_v3 import TranslationServiceAsyncClient
+from cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ID = os.getenv("GOOGLE_CLOUD_PROJECT") or "zeta-verbena-258608"  # or your actual project ID
+LOCATION = "global"  # NMT default location
+PARENT = f"projects/{PROJECT_ID}/locations/{LOCATION}"
+TRANSLATE_TIMEOUT = float(os.getenv("TRANSLATE_TIMEOUT", "15"))  # seconds, gRPC deadline per call
+BATCH_WINDOW = float(os.getenv("TRANSLATE_BATCH_WINDOW", "0.03"))  # seconds to wait for more texts
+BATCH_MAX_ITEMS = 128  # API limit is 1024 strings per request
+BATCH_MAX_CHARS = 25000  # API recommends staying under 30k code points per request
+
+CACHE_SIZE = int(os.getenv("TRANSLATION_CACHE_SIZE", "4096"))
+CACHE_TTL = float(os.getenv("TRANSLATION_CACHE_TTL", str(7 * 24 * 3600)))  # seconds
+CACHE_DB = os.getenv("TRANSLATION_CACHE_DB")  # optional SQLite file that survives restarts
+
+_client = None
+translation_cache = LRUCache(maxsize=CACHE_SIZE, ttl=CACHE_TTL)
+
+
+class DiskCache:
+    """SQLite tier behind the in-memory cache; entries older than the TTL are ignored."""
+
+    def __init__(self, path, ttl=CACHE_TTL):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS translations ("
+            "key TEXT PRIMARY KEY, translated TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT translated FROM translations WHERE key = ? AND created_at > ?",
+                (key, time.time() - self.ttl),
+            ).fetchone()
+        if row:
+            self.hits += 1
+            return row[0]
+        self.misses += 1
+        return None
+
+    def set(self, key, translated):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO translations (key, translated, created_at) VALUES (?, ?, ?)",
+                (key, translated, time.time()),
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+disk_cache = DiskCache(CACHE_DB) if CACHE_DB else None
+
+
+def cache_key(text, target_lang):
+    return f"{target_lang}:{hashlib.sha256(text.encode('utf-8')).hexdigest()}"
+
+
+def cache_stats():
+    stats = {"memory": translation_cache.stats(), "batching": {"rpcs": batcher.rpcs, "texts": batcher.texts}}
+    if disk_cache is not None:
+        stats["disk"] = {"hits": disk_cache.hits, "misses": disk_cache.misses}
+    return stats
+
+
+def get_client():
+    """The shared async Translation client, created on first use inside the event loop."""
+    global _client
+    if _client is None:
+        _client = TranslationServiceAsyncClient()
+    return _client
+
+
+def set_client(client):
+    """Swap in another client, e.g. a stub in tests."""
+    global _client
+    _client = client
+
+
+class TranslationBatcher:
+    """Coalesces concurrent translate() calls into one translate_text RPC.
+
+    Texts for the same target language are collected for up to `window`
+    seconds (or until a batch is full), sent as a single request and the
+    results are handed back to each waiting caller. A batch never goes over
+    `max_chars`; a text that long on its own is sent by itself.
+    """
+
+    def __init__(self, window=BATCH_WINDOW, max_items=BATCH_MAX_ITEMS, max_chars=BATCH_MAX_CHARS):
+        self.window = window
+        self.max_items = max_items
+        self.max_chars = max_chars
+        self.rpcs = 0
+        self.texts = 0
+        self._pending = {}  # target_lang -> [(text, future)]
+        self._chars = {}
+        self._timers = {}
+
+    async def submit(self, text, target_lang):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        if len(text) >= self.max_chars:
+            # Too long to share a request; an error for it stays with this caller.
+            loop.create_task(self._send(target_lang, [(text, future)]))
+            return await future
+        if self._chars.get(target_lang, 0) + len(text) > self.max_chars:
+            self._flush(target_lang)  # send what is pending rather than push it over the limit
+        batch = self._pending.setdefault(target_lang, [])
+        batch.append((text, future))
+        self._chars[target_lang] = self._chars.get(target_lang, 0) + len(text)
+        if len(batch) >= self.max_items or self._chars[target_lang] >= self.max_chars:
+            self._flush(target_lang)
+        elif target_lang not in self._timers:
+            self._timers[target_lang] = loop.call_later(self.window, self._flush, target_lang)
+        return await future
+
+    def _flush(self, target_lang):
+        timer = self._timers.pop(target_lang, None)
+        if timer is not None:
+            timer.cancel()
+        self._chars.pop(target_lang, None)
+        batch = self._pending.pop(target_lang, None)
+        if batch:
+            asyncio.get_running_loop().create_task(self._send(target_lang, batch))
+
+    async def _send(self, target_lang, batch):
+        contents = list(dict.fromkeys(text for text, _ in batch))
+        self.rpcs += 1
+        self.texts += len(batch)
+        try:
+            response = await get_client().translate_text(
+                contents=contents,
+                target_language_code=target_lang,
+                mime_type="text/plain",
+                parent=PARENT,
+                timeout=TRANSLATE_TIMEOUT,
+            )
+            results = {
+                text: html.unescape(translation.translated_text)
+                for text, translation in zip(contents, response.translations)
+            }
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for text, future in batch:
+            if not future.done():
+                future.set_result(results[text])
+
+
+batcher = TranslationBatcher()
+
+
+async def translate(text, target_lang):
+    key = cache_key(text, target_lang)
+    translated = translation_cache.get(key)
+    if translated is not None:
+        return translated
+    if disk_cache is not None:
+        translated = await asyncio.to_thread(disk_cache.get, key)
+        if translated is not None:
+            translation_cache.set(key, translated)
+            return translated
+
+    translated = await batcher.submit(text, target_lang)
+    translation_cache.set(key, translated)
+    if disk_cache is not None:
+        await asyncio.to_thread(disk_cache.set, key, translated)
+    return translated
+
+
+async def close():
+    global _client
+    logger.info("Translation cache: %s", cache_stats())
+    if disk_cache is not None:
+        disk_cache.close()
+    if _client is not None:
+        transport = getattr(_client, "transport", None)
+        if transport is not None:
+            await transport.close()
+        _client = None
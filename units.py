@@ -0,0 +1,137 @@
+"""Unit registry for plain-text unit conversions ("170 cm to ft").
+
+Every unit belongs to a dimension and converts to that dimension's base unit
+as base = value * factor + offset (the offset is non-zero only for
+temperature). SI prefixes and length/time speed units are generated from
+the base definitions. Every same-dimension pair is precomputed into
+CONVERSIONS at import, so convert() is one dict lookup.
+"""
+
+# key: (dimension, factor to base, offset, aliases)
+_BASE_UNITS = {
+    # mass, base kg
+    "lbs": ("mass", 0.45359237, 0.0, ["lbs", "lb", "pound", "pounds"]),
+    "oz": ("mass", 0.028349523125, 0.0, ["oz", "ounce", "ounces"]),
+    "st": ("mass", 6.35029318, 0.0, ["st", "stone", "stones"]),
+    "t": ("mass", 1000.0, 0.0, ["t", "tonne", "tonnes", "metric ton", "metric tons"]),
+    # length, base m
+    "ft": ("length", 0.3048, 0.0, ["ft", "foot", "feet"]),
+    "in": ("length", 0.0254, 0.0, ["in", "inch", "inches"]),
+    "yd": ("length", 0.9144, 0.0, ["yd", "yard", "yards"]),
+    "mi": ("length", 1609.344, 0.0, ["mi", "mile", "miles"]),
+    "nmi": ("length", 1852.0, 0.0, ["nmi", "nautical mile", "nautical miles"]),
+    # volume, base l
+    "gal": ("volume", 3.785411784, 0.0, ["gal", "gallon", "gallons"]),
+    "qt": ("volume", 0.946352946, 0.0, ["qt", "quart", "quarts"]),
+    "pt": ("volume", 0.473176473, 0.0, ["pt", "pint", "pints"]),
+    "cup": ("volume", 0.2365882365, 0.0, ["cup", "cups"]),
+    "fl oz": ("volume", 0.0295735295625, 0.0, ["fl oz", "fluid ounce", "fluid ounces"]),
+    "tbsp": ("volume", 0.01478676478125, 0.0, ["tbsp", "tablespoon", "tablespoons"]),
+    "tsp": ("volume", 0.00492892159375, 0.0, ["tsp", "teaspoon", "teaspoons"]),
+    # time, base s
+    "s": ("time", 1.0, 0.0, ["s", "sec", "secs", "second", "seconds"]),
+    "min": ("time", 60.0, 0.0, ["min", "mins", "minute", "minutes"]),
+    "h": ("time", 3600.0, 0.0, ["h", "hr", "hrs", "hour", "hours"]),
+    "day": ("time", 86400.0, 0.0, ["day", "days"]),
+    "week": ("time", 604800.0, 0.0, ["week", "weeks"]),
+    # temperature, base K
+    "c": ("temperature", 1.0, 273.15, ["c", "celsius"]),
+    "f": ("temperature", 5 / 9, 273.15 - 32 * 5 / 9, ["f", "fahrenheit"]),
+    "k": ("temperature", 1.0, 0.0, ["k", "kelvin"]),
+}
+
+# SI units that take prefixes: symbol -> (dimension, names)
+_SI_UNITS = {
+    "m": ("length", ["meter", "meters", "metre", "metres"]),
+    "g": ("mass", ["gram", "grams"]),
+    "l": ("volume", ["liter", "liters", "litre", "litres"]),
+}
+# symbol, name, factor; kg is the mass base, so grams are scaled by 1/1000 below
+_SI_PREFIXES = [
+    ("", "", 1.0),
+    ("k", "kilo", 1e3),
+    ("h", "hecto", 1e2),
+    ("d", "deci", 1e-1),
+    ("c", "centi", 1e-2),
+    ("m", "milli", 1e-3),
+    ("µ", "micro", 1e-6),
+    ("n", "nano", 1e-9),
+]
+_SI_BASE_SCALE = {"m": 1.0, "g": 1e-3, "l": 1.0}
+
+# speed units are length/time; these get their familiar names
+_SPEED_NAMES = {"mi/h": "mph", "nmi/h": "kn"}
+_SPEED_ALIASES = {
+    "mph": ["mph"],
+    "km/h": ["kph", "kmh", "kmph"],
+    "kn": ["kn", "kt", "knot", "knots"],
+}
+
+UNITS = {}  # key -> (dimension, factor, offset)
+UNIT_ALIASES = {}  # alias -> key
+
+
+def _add(key, dimension, factor, offset, aliases):
+    UNITS[key] = (dimension, factor, offset)
+    for alias in [key, *aliases]:
+        UNIT_ALIASES.setdefault(alias, key)
+
+
+for _key, (_dimension, _factor, _offset, _aliases) in _BASE_UNITS.items():
+    _add(_key, _dimension, _factor, _offset, _aliases)
+
+for _symbol, (_dimension, _names) in _SI_UNITS.items():
+    for _prefix, _prefix_name, _scale in _SI_PREFIXES:
+        if _symbol == "l" and _prefix in ("n", "µ"):
+            continue  # nl/µl are not worth the alias space
+        _aliases = [_prefix_name + name for name in _names]
+        if _prefix:
+            _aliases.append(_prefix + _symbol + "s")  # "kgs", "kms"
+        if _prefix == "µ":
+            _aliases += ["u" + _symbol, "μ" + _symbol]  # ASCII u, Greek mu
+        _add(_prefix + _symbol, _dimension, _scale * _SI_BASE_SCALE[_symbol], 0.0, _aliases)
+UNIT_ALIASES["cc"] = "ml"
+
+for _length, (_dimension, _length_factor, _) in list(UNITS.items()):
+    if _dimension != "length":
+        continue
+    for _time in ("s", "min", "h"):
+        _key = _SPEED_NAMES.get(f"{_length}/{_time}", f"{_length}/{_time}")
+        _add(_key, "speed", _length_factor / UNITS[_time][1], 0.0, _SPEED_ALIASES.get(_key, []))
+        UNIT_ALIASES[f"{_length}/{_time}"] = _key
+
+# (from, to) -> (scale, offset): to = from * scale + offset
+CONVERSIONS = {
+    (a, b): (fa / fb, (oa - ob) / fb)
+    for a, (da, fa, oa) in UNITS.items()
+    for b, (db, fb, ob) in UNITS.items()
+    if da == db and a != b
+}
+
+
+def lookup(name):
+    """Unit key for a user-typed name ("kilometers", "°C", "miles per hour"), or None."""
+    name = " ".join(name.lower().replace("°", " ").split())
+    for word in ("degrees ", "degree "):
+        if name.startswith(word):
+            name = name[len(word):]
+    key = UNIT_ALIASES.get(name)
+    if key is None and ("/" in name or " per " in name):
+        numerator, _, denominator = name.replace(" per ", "/").partition("/")
+        key = UNIT_ALIASES.get(f"{UNIT_ALIASES.get(numerator.strip())}/{UNIT_ALIASES.get(denominator.strip())}")
+    return key
+
+
+def dimension(key):
+    return UNITS[key][0]
+
+
+def convert(amount, from_unit, to_unit):
+    """Return (result, rate); rate is None for affine (temperature) conversions."""
+    if from_unit == to_unit and from_unit in UNITS:
+        return amount, (1.0 if dimension(from_unit) != "temperature" else None)
+    conversion = CONVERSIONS.get((from_unit, to_unit))
+    if conversion is None:
+        return None, None
+    scale, offset = conversion
+    return amount * scale + offset, (scale if offset == 0 else None)
@@ -1,44 +1,84 @@
 import re
-import json
+import asyncio
 from datetime import datetime
-import json
 import logging
-import requests
+import httpx
 import os
+from rate_store import rate_store
+import units
 
 logger = logging.getLogger(__name__)
 OPEN_EXCHANGE_APP_ID = os.getenv("OPEN_EXCHANGE_APP_ID")
-CACHE_FILE = "usd_rates.json"
-
-def fetch_rates():
-    from pathlib import Path
-    if Path(CACHE_FILE).exists():
-        try:
-            with open(CACHE_FILE) as f:
-                cache = json.load(f)
-                last_time = datetime.fromisoformat(cache["timestamp"])
-                now = datetime.utcnow()
-                if last_time.year == now.year and last_time.month == now.month and last_time.day == now.day and last_time.hour == now.hour:
-                    logger.info("Rates already fetched this hour. Skipping.")
+
+RATES_URL = os.getenv("OPEN_EXCHANGE_URL", "https://openexchangerates.org/api/latest.json")
+FETCH_TIMEOUT = httpx.Timeout(10.0, connect=5.0)
+FETCH_RETRIES = 4
+FETCH_BACKOFF = 2.0  # seconds, doubled after each failed attempt
+STALE_AFTER = 3 * 3600  # rates older than this are flagged in replies
+
+_http_client = None
+_fetch_lock = asyncio.Lock()
+
+
+def get_http_client():
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            timeout=FETCH_TIMEOUT,
+            limits=httpx.Limits(max_connections=4, max_keepalive_connections=2),
+        )
+    return _http_client
+
+
+async def close_http_client():
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+async def fetch_rates():
+    # Only one refresh at a time; readers keep using the current snapshot meanwhile.
+    if _fetch_lock.locked():
+        return
+    async with _fetch_lock:
+        snapshot = rate_store.snapshot()
+        if snapshot is not None:
+            last_time = datetime.fromisoformat(snapshot.timestamp)
+            if last_time.strftime("%Y%m%d%H") == datetime.utcnow().strftime("%Y%m%d%H"):
+                logger.info("Rates already fetched this hour. Skipping.")
+                return
+
+        client = get_http_client()
+        delay = FETCH_BACKOFF
+        for attempt in range(1, FETCH_RETRIES + 1):
+            try:
+                response = await client.get(RATES_URL, params={"app_id": OPEN_EXCHANGE_APP_ID})
+                if response.status_code == 200:
+                    rates = response.json()["rates"]
+                    await asyncio.to_thread(rate_store.save, datetime.utcnow().isoformat(), rates)
+                    logger.info("Exchange rates updated.")
                     return
-        except Exception as e:
-            logger.warning("Error reading cache. Proceeding to refetch.", exc_info=True)
-
-    try:
-        url = f"https://openexchangerates.org/api/latest.json?app_id={OPEN_EXCHANGE_APP_ID}"
-        response = requests.get(url)
-        if response.status_code == 200:
-            data = response.json()
-            with open(CACHE_FILE, "w") as f:
-                json.dump({"timestamp": datetime.utcnow().isoformat(), "rates": data["rates"]}, f)
-            logger.info("Exchange rates updated.")
+                logger.error(f"Failed to fetch rates: {response.status_code} - {response.text}")
+                if response.status_code < 500 and response.status_code != 429:
+                    break
+            except Exception:
+                logger.error("Network/API error while fetching rates:", exc_info=True)
+            if attempt < FETCH_RETRIES:
+                await asyncio.sleep(delay)
+                delay *= 2
+
+        age = rate_store.age()
+        if age is None:
+            logger.error("No exchange rates available yet.")
         else:
-            logger.error(f"Failed to fetch rates: {response.status_code} - {response.text}")
-    except Exception as e:
-        logger.error("Network/API error while fetching rates:", exc_info=True)
+            logger.warning(f"Serving exchange rates that are {age / 3600:.1f}h old.")
+
+CURRENCY_PATTERN = re.compile(r"(\d+(?:\.\d+)?)\s*([a-zA-Z]{3})\s+to\s+([a-zA-Z]{3})", re.IGNORECASE)
+UNIT_PATTERN = re.compile(r"(\d+(?:\.\d+)?)\s*([a-zA-Zµμ°/ ]+)\s+to\s+([a-zA-Zµμ°/ ]+)", re.IGNORECASE)
 
 def parse_message(text):
-    match = re.match(r"(\d+(?:\.\d+)?)\s*([a-zA-Z]{3})\s+to\s+([a-zA-Z]{3})", text.strip(), re.IGNORECASE)
+    match = CURRENCY_PATTERN.match(text.strip())
     if match:
         amount = float(match.group(1))
         from_cur = match.group(2).upper()
@@ -47,55 +87,24 @@ def parse_message(text):
     return None
 
 
-def convert_currency(amount, from_cur, to_cur):
-    try:
-        with open(CACHE_FILE) as f:
-            cache = json.load(f)
-        rates = cache["rates"]
-        from_rate = rates.get(from_cur)
-        to_rate = rates.get(to_cur)
-        if from_rate is None or to_rate is None:
-            return None, None, None
-        result = amount * (to_rate / from_rate)
-        rate = to_rate / from_rate
-        return result, rate, cache["timestamp"]
-    except Exception:
+def convert_currency(amount, from_cur, to_cur, snapshot=None):
+    # Batch replies pass one snapshot so every line uses the same rates.
+    if snapshot is None:
+        snapshot = rate_store.snapshot()
+    if snapshot is None:
         return None, None, None
+    rate = snapshot.rate(from_cur, to_cur)
+    if rate is None:
+        return None, None, None
+    return amount * rate, rate, snapshot.timestamp
 
 
 def parse_unit_message(text):
-    unit_keywords = {
-        "kg": ["kg", "kilogram", "kilograms"],
-        "lbs": ["lbs", "lb", "pound", "pounds"],
-        "g": ["g", "gram", "grams"],
-        "oz": ["oz", "ounce", "ounces"],
-        "m": ["m", "meter", "meters"],
-        "ft": ["ft", "foot", "feet"],
-        "cm": ["cm", "centimeter", "centimeters"],
-        "in": ["in", "inch", "inches"],
-        "km": ["km", "kilometer", "kilometers"],
-        "mi": ["mi", "mile", "miles"],
-        "l": ["l", "liter", "liters"],
-        "gal": ["gal", "gallon", "gallons"],
-        "ml": ["ml", "milliliter", "milliliters"],
-        "fl oz": ["fl oz", "fluid ounce", "fluid ounces"],
-        "km/h": ["km/h", "kilometers per hour"],
-        "mph": ["mph", "miles per hour"],
-        "m/s": ["m/s", "meters per second"],
-        "ft/s": ["ft/s", "feet per second"],
-        "c": ["c", "celsius", "degree celsius"],
-        "f": ["f", "fahrenheit", "degree fahrenheit"],
-        "k": ["k", "kelvin"]
-    }
-
-    match = re.match(r"(\d+(?:\.\d+)?)\s*([a-zA-Z ]+)\s+to\s+([a-zA-Z ]+)", text.strip(), re.IGNORECASE)
+    match = UNIT_PATTERN.match(text.strip())
     if match:
         amount = float(match.group(1))
-        from_unit = match.group(2).strip().lower()
-        to_unit = match.group(3).strip().lower()
-
-        from_unit_key = next((key for key, aliases in unit_keywords.items() if from_unit in aliases), None)
-        to_unit_key = next((key for key, aliases in unit_keywords.items() if to_unit in aliases), None)
+        from_unit_key = units.lookup(match.group(2))
+        to_unit_key = units.lookup(match.group(3))
 
         if from_unit_key and to_unit_key:
             return amount, from_unit_key, to_unit_key
@@ -104,45 +113,8 @@ def parse_unit_message(text):
 
 
 def convert_unit(amount, from_unit, to_unit):
-    conversions = {
-        ("kg", "lbs"): 2.20462,
-        ("lbs", "kg"): 0.453592,
-        ("g", "oz"): 0.035274,
-        ("oz", "g"): 28.3495,
-        ("m", "ft"): 3.28084,
-        ("ft", "m"): 0.3048,
-        ("cm", "in"): 0.393701,
-        ("in", "cm"): 2.54,
-        ("km", "mi"): 0.621371,
-        ("mi", "km"): 1.60934,
-        ("l", "gal"): 0.264172,
-        ("gal", "l"): 3.78541,
-        ("ml", "fl oz"): 0.033814,
-        ("fl oz", "ml"): 29.5735,
-        ("km/h", "mph"): 0.621371,
-        ("mph", "km/h"): 1.60934,
-        ("m/s", "ft/s"): 3.28084,
-        ("ft/s", "m/s"): 0.3048
-    }
-
-    if (from_unit, to_unit) in conversions:
-        result = amount * conversions[(from_unit, to_unit)]
-        return result, conversions[(from_unit, to_unit)]
-
-    if from_unit == "c" and to_unit == "f":
-        return (amount * 9/5) + 32, None
-    elif from_unit == "f" and to_unit == "c":
-        return (amount - 32) * 5/9, None
-    elif from_unit == "c" and to_unit == "k":
-        return amount + 273.15, None
-    elif from_unit == "k" and to_unit == "c":
-        return amount - 273.15, None
-    elif from_unit == "f" and to_unit == "k":
-        return (amount - 32) * 5/9 + 273.15, None
-    elif from_unit == "k" and to_unit == "f":
-        return (amount - 273.15) * 9/5 + 32, None
-
-    return None, None
+    """Any same-dimension conversion from the units registry; rate is None for temperature."""
+    return units.convert(amount, from_unit, to_unit)
 
 
 def format_rate(rate: float) -> str:
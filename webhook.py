@@ -0,0 +1,160 @@
+"""Webhook runtime: Telegram POSTs updates to an aiohttp server instead of
+the bot long-polling getUpdates. BOT_MODE=worker runs a process that only
+delivers reminders next to one that receives updates.
+
+Updates go onto the Application's update_queue and run concurrently
+(CONCURRENT_UPDATES). PTB takes them off the queue as soon as they arrive, so
+backpressure counts admitted updates until their handlers finish: once
+UPDATE_QUEUE_SIZE are pending the request gets a 503 and Telegram redelivers
+it later, so a burst can't grow memory without limit.
+"""
+import asyncio
+import contextlib
+import hmac
+import json
+import logging
+import os
+import signal
+from aiohttp import web
+from telegram import Update
+from telegram.ext import SimpleUpdateProcessor
+
+from sender import sender
+
+logger = logging.getLogger(__name__)
+
+BOT_MODE = os.getenv("BOT_MODE", "polling")  # "polling", "webhook" or "worker" (delivery only)
+WEBHOOK_URL = os.getenv("WEBHOOK_URL")  # public https base URL; unset to leave setWebhook to a proxy/deploy step
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/telegram")
+WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8080"))
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET")
+WEBHOOK_MAX_CONNECTIONS = int(os.getenv("WEBHOOK_MAX_CONNECTIONS", "40"))  # Telegram -> us, 1..100
+UPDATE_QUEUE_SIZE = int(os.getenv("UPDATE_QUEUE_SIZE", "1000"))  # admitted but unfinished updates
+CONCURRENT_UPDATES = int(os.getenv("CONCURRENT_UPDATES", "64"))
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+class PendingUpdateProcessor(SimpleUpdateProcessor):
+    """Runs updates like PTB's default processor, counting admitted ones until they finish."""
+
+    def __init__(self, max_concurrent_updates, max_pending):
+        super().__init__(max_concurrent_updates)
+        self.max_pending = max_pending
+        self.pending = 0
+
+    def admit(self):
+        if self.pending >= self.max_pending:
+            return False
+        self.pending += 1
+        return True
+
+    async def do_process_update(self, update, coroutine):
+        try:
+            await coroutine
+        finally:
+            self.pending -= 1
+
+
+def configure(builder):
+    """Builder settings for webhook mode: bounded pending updates, concurrent handlers, no poller."""
+    return (
+        builder
+        .concurrent_updates(PendingUpdateProcessor(CONCURRENT_UPDATES, UPDATE_QUEUE_SIZE))
+        .updater(None)
+    )
+
+
+def make_web_app(application):
+    processor = application.update_processor
+    async def telegram_update(request):
+        token = request.headers.get(SECRET_HEADER, "")
+        if not hmac.compare_digest(token.encode(), WEBHOOK_SECRET.encode()):
+            return web.Response(status=403)
+        try:
+            update = Update.de_json(await request.json(), application.bot)
+        except (ValueError, KeyError, TypeError):
+            return web.Response(status=400)
+        if not processor.admit():
+            logger.warning("%d updates pending, asking Telegram to retry update %s", processor.pending, update.update_id)
+            return web.Response(status=503)
+        application.update_queue.put_nowait(update)
+        return web.Response()
+
+    async def health(request):
+        return web.Response(
+            text=json.dumps({
+                "status": "ok" if application.running else "starting",
+                "pending_updates": processor.pending,
+                "pending_updates_max": processor.max_pending,
+                "running_updates": processor.current_concurrent_updates,
+                "sender": sender.stats(),
+            }),
+            content_type="application/json",
+        )
+
+    web_app = web.Application()
+    web_app.router.add_post(WEBHOOK_PATH, telegram_update)
+    web_app.router.add_get("/health", health)
+    return web_app
+
+
+def _stop_on_signals():
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    return stop
+
+
+@contextlib.asynccontextmanager
+async def _running(application):
+    """Application.run_polling's start/stop sequence and hooks, without the updater."""
+    await application.initialize()
+    if application.post_init:
+        await application.post_init(application)
+    await application.start()
+    try:
+        yield
+    finally:
+        await application.stop()
+        if application.post_stop:
+            await application.post_stop(application)
+        await application.shutdown()
+        if application.post_shutdown:
+            await application.post_shutdown(application)
+
+
+async def run_webhook(application):
+    """Serve the webhook until SIGINT/SIGTERM, mirroring Application.run_polling's lifecycle."""
+    if not WEBHOOK_SECRET:
+        raise RuntimeError("WEBHOOK_SECRET must be set in webhook mode")
+
+    stop = _stop_on_signals()
+    async with _running(application):
+        runner = web.AppRunner(make_web_app(application), access_log=None)
+        await runner.setup()
+        try:
+            await web.TCPSite(runner, WEBHOOK_HOST, WEBHOOK_PORT).start()
+            if WEBHOOK_URL:
+                await application.bot.set_webhook(
+                    url=WEBHOOK_URL.rstrip("/") + WEBHOOK_PATH,
+                    secret_token=WEBHOOK_SECRET,
+                    max_connections=WEBHOOK_MAX_CONNECTIONS,
+                    allowed_updates=Update.ALL_TYPES,
+                )
+            logger.info("Webhook listening on %s:%d%s", WEBHOOK_HOST, WEBHOOK_PORT, WEBHOOK_PATH)
+            await stop.wait()
+        finally:
+            await runner.cleanup()
+
+
+async def run_worker(application):
+    """Run the startup/shutdown hooks (reminders, rate refresh, sender) until
+    SIGINT/SIGTERM without receiving updates, so extra delivery processes
+    neither compete for getUpdates nor bind the webhook port."""
+    stop = _stop_on_signals()
+    async with _running(application):
+        logger.info("Worker %s running without updates", application.bot.username)
+        await stop.wait()